@@ -7,7 +7,6 @@ from scipy.optimize import curve_fit
 import os
 import glob
 import time
-import pickle
 from collections import Counter
 import heapq
 import zlib
@@ -29,6 +28,105 @@ class NodoHuffman:
         return self.freq < other.freq
 
 
+# ===============================================================
+# ESCRITURA / LECTURA DE BITS
+# ===============================================================
+def _escribir_varint(n):
+    # Entero sin signo en base 128 (LEB128): 7 bits por byte, bit alto = "siguen más bytes"
+    salida = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            salida.append(byte | 0x80)
+        else:
+            salida.append(byte)
+            return bytes(salida)
+
+
+def _leer_varint(datos, pos):
+    # Devuelve (valor, posición siguiente); IndexError si los datos terminan a mitad del número
+    valor = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[pos]
+        pos += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor, pos
+        desplazamiento += 7
+        if desplazamiento > 63:
+            raise ValueError("Varint demasiado largo")
+
+
+class EscritorBits:
+    # Escribe códigos de longitud variable (MSB primero) en un bytearray
+    # usando un acumulador de menos de 64 bits que se vuelca de 8 en 8 bytes
+    
+    def __init__(self):
+        self.datos = bytearray()
+        self.acumulador = 0
+        self.pendientes = 0
+    
+    @property
+    def n_bits(self):
+        return len(self.datos) * 8 + self.pendientes
+    
+    def escribir(self, valor, longitud):
+        self.acumulador = (self.acumulador << longitud) | valor
+        self.pendientes += longitud
+        if self.pendientes >= 64:
+            self.pendientes -= 64
+            self.datos += (self.acumulador >> self.pendientes).to_bytes(8, 'big')
+            self.acumulador &= (1 << self.pendientes) - 1
+    
+    def escribir_codigos(self, pares):
+        # escribir() para cada (valor, longitud), con el acumulador en variables locales
+        datos, acumulador, pendientes = self.datos, self.acumulador, self.pendientes
+        for valor, longitud in pares:
+            acumulador = (acumulador << longitud) | valor
+            pendientes += longitud
+            if pendientes >= 64:
+                pendientes -= 64
+                datos += (acumulador >> pendientes).to_bytes(8, 'big')
+                acumulador &= (1 << pendientes) - 1
+        self.acumulador, self.pendientes = acumulador, pendientes
+    
+    def cerrar(self):
+        # Bytes escritos, con el último byte completado con ceros
+        relleno = -self.pendientes % 8
+        return bytes(self.datos) + (self.acumulador << relleno).to_bytes((self.pendientes + relleno) // 8, 'big')
+
+
+class LectorBits:
+    # Lee de a `longitud` bits (MSB primero) de los primeros n_bits de datos
+    
+    def __init__(self, datos, n_bits=None):
+        self.datos = memoryview(datos)
+        self.n_bits = len(datos) * 8 if n_bits is None else min(n_bits, len(datos) * 8)
+        self.posicion = 0
+        self.acumulador = 0
+        self.disponibles = 0
+        self.siguiente_byte = 0
+    
+    def restantes(self):
+        return self.n_bits - self.posicion
+    
+    def leer(self, longitud):
+        if longitud > self.restantes():
+            raise EOFError("No quedan suficientes bits")
+        while self.disponibles < longitud:
+            trozo = self.datos[self.siguiente_byte:self.siguiente_byte + 8]
+            self.acumulador = (self.acumulador << (8 * len(trozo))) | int.from_bytes(trozo, 'big')
+            self.disponibles += 8 * len(trozo)
+            self.siguiente_byte += len(trozo)
+        self.disponibles -= longitud
+        self.posicion += longitud
+        valor = self.acumulador >> self.disponibles
+        self.acumulador &= (1 << self.disponibles) - 1
+        return valor
+
+
 # ===============================================================
 # CLASE COMPRESOR HUFFMAN
 # ===============================================================
@@ -58,58 +156,193 @@ class CompresorHuffman:
         return heap[0] if heap else None
     
     def generar_codigos(self, nodo, codigo_actual=""):
-        # Genera códigos Huffman
-        if nodo is None:
-            return
-        
-        if nodo.char is not None:
-            self.codigos[nodo.char] = codigo_actual if codigo_actual else "0"
-            return
-        
-        self.generar_codigos(nodo.left, codigo_actual + "0")
-        self.generar_codigos(nodo.right, codigo_actual + "1")
+        # Genera códigos Huffman (recorrido con pila, sin recursión)
+        pila = [(nodo, codigo_actual)]
+        while pila:
+            nodo, codigo = pila.pop()
+            if nodo is None:
+                continue
+            if nodo.char is not None:
+                self.codigos[nodo.char] = codigo if codigo else "0"
+                continue
+            pila.append((nodo.right, codigo + "1"))
+            pila.append((nodo.left, codigo + "0"))
     
+    # Longitud máxima de código (package-merge si el Huffman óptimo la excede)
+    LONGITUD_MAXIMA = 32
     
-    def comprimir_a_bytes(self, texto):
-        bits_comprimidos, frecuencias = self.comprimir(texto)
-        
-        # Agregar padding
-        padding = (8 - len(bits_comprimidos) % 8) % 8
-        bits_comprimidos += '0' * padding
+    def longitudes_codigo(self, frecuencias, longitud_maxima=None):
+        # Longitudes de Huffman sin árbol: dos colas (hojas ordenadas por frecuencia y nodos
+        # internos, que salen ya ordenados) y un arreglo de padres
+        hojas = sorted(frecuencias, key=lambda c: (frecuencias[c], c))
+        n = len(hojas)
+        if n <= 1:
+            return {c: 1 for c in hojas}
+        peso = [frecuencias[c] for c in hojas]
+        padre = [0] * (2 * n - 1)
+        i, j = 0, n
+        for nuevo in range(n, 2 * n - 1):
+            suma = 0
+            for _ in range(2):
+                if i < n and (j == nuevo or peso[i] <= peso[j]):
+                    k, i = i, i + 1
+                else:
+                    k, j = j, j + 1
+                padre[k] = nuevo
+                suma += peso[k]
+            peso.append(suma)
+        profundidad = [0] * (2 * n - 1)
+        for k in range(2 * n - 3, -1, -1):
+            profundidad[k] = profundidad[padre[k]] + 1
+        if longitud_maxima is not None and max(profundidad[:n]) > longitud_maxima:
+            return self._package_merge(hojas, peso[:n], longitud_maxima)
+        return dict(zip(hojas, profundidad))
+    
+    def _package_merge(self, hojas, pesos, longitud_maxima):
+        # Cada nivel = hojas + paquetes (pares consecutivos) del nivel anterior; de los 2n-2
+        # primeros del último nivel, cada hoja suma 1 por nivel en que queda elegida
+        n = len(hojas)
+        if 1 << longitud_maxima < n:
+            raise ValueError(f"{n} símbolos no caben en códigos de {longitud_maxima} bits")
+        base = [(w, k) for k, w in enumerate(pesos)]
+        niveles = [base]
+        for _ in range(longitud_maxima - 1):
+            previo = niveles[-1]
+            paquetes = [(previo[a][0] + previo[a + 1][0], -1) for a in range(0, len(previo) - 1, 2)]
+            niveles.append(list(heapq.merge(base, paquetes, key=lambda x: x[0])))
+        longitudes = [0] * n
+        tomar = 2 * n - 2
+        for nivel in reversed(niveles):
+            paquetes = 0
+            for _, k in nivel[:tomar]:
+                if k < 0:
+                    paquetes += 1
+                else:
+                    longitudes[k] += 1
+            tomar = 2 * paquetes
+        return dict(zip(hojas, longitudes))
+    
+    
+    # Formato del paquete: MAGIC | versión | varint nº símbolos | varint deltas de código Unicode
+    # | longitud de código de cada símbolo (1 byte) | varint nº de bits | datos empaquetados.
+    # Los códigos son canónicos, así que las longitudes bastan para reconstruirlos.
+    MAGIC = b"HUF"
+    VERSION = 1
+    
+    def codigos_canonicos(self, longitudes):
+        # {símbolo: longitud} -> {símbolo: código}; códigos consecutivos en orden (longitud, símbolo)
+        codigos = {}
+        codigo = 0
+        longitud_previa = 0
+        for simbolo, longitud in sorted(longitudes.items(), key=lambda x: (x[1], x[0])):
+            codigo <<= longitud - longitud_previa
+            codigos[simbolo] = format(codigo, f'0{longitud}b')
+            codigo += 1
+            longitud_previa = longitud
+        return codigos
+    
+    def comprimir(self, texto):
+        # Codifica el texto directo en bytes (sin cadena intermedia de '0'/'1')
+        frecuencias = dict(Counter(texto))
+        longitudes = self.longitudes_codigo(frecuencias, self.LONGITUD_MAXIMA)
+        self.codigos = self.codigos_canonicos(longitudes)
         
-        # Convertir a bytes
-        bytes_comprimidos = bytearray()
-        for i in range(0, len(bits_comprimidos), 8):
-            byte = bits_comprimidos[i:i+8]
-            bytes_comprimidos.append(int(byte, 2))
+        tabla = {char: (int(codigo, 2), len(codigo)) for char, codigo in self.codigos.items()}
+        escritor = EscritorBits()
+        escritor.escribir_codigos(map(tabla.__getitem__, texto))
+        return escritor.cerrar(), escritor.n_bits, longitudes
+    
+    def descomprimir(self, datos, n_bits, longitudes):
+        # Decodificación canónica sin árbol: para cada longitud L los códigos son
+        # consecutivos a partir de primero[L], así que basta una resta por bit
+        if not longitudes:
+            return ""
+        orden = sorted(longitudes, key=lambda c: (longitudes[c], c))
+        maxima = max(longitudes.values())
+        cuenta = [0] * (maxima + 2)
+        for char in orden:
+            cuenta[longitudes[char]] += 1
+        primero = [0] * (maxima + 2)
+        indice = [0] * (maxima + 2)
+        codigo = 0
+        for l in range(1, maxima + 1):
+            codigo = (codigo + cuenta[l - 1]) << 1
+            primero[l] = codigo
+            indice[l] = indice[l - 1] + cuenta[l - 1]
         
-        # Empaquetar
-        paquete = {
-            'frecuencias': frecuencias,
-            'padding': padding,
-            'datos': bytes(bytes_comprimidos)
-        }
+        lector = LectorBits(datos, n_bits)
+        resultado = []
+        codigo = largo = 0
+        while lector.restantes():
+            # Se lee de a un byte y se recorren sus bits localmente
+            cuantos = min(8, lector.restantes())
+            byte = lector.leer(cuantos)
+            for desplazamiento in range(cuantos - 1, -1, -1):
+                codigo = (codigo << 1) | ((byte >> desplazamiento) & 1)
+                largo += 1
+                d = codigo - primero[largo]
+                if d < cuenta[largo]:
+                    resultado.append(orden[indice[largo] + d])
+                    codigo = largo = 0
+                elif largo == maxima:
+                    raise ValueError("Datos Huffman inválidos")
+        return ''.join(resultado)
+    
+    def comprimir_a_bytes(self, texto):
+        datos, n_bits, longitudes = self.comprimir(texto)
+        simbolos = sorted(longitudes)
+        if simbolos and max(longitudes.values()) > 255:
+            raise ValueError("Código Huffman demasiado largo")
         
-        paquete_serializado = pickle.dumps(paquete)
-        return base64.b64encode(paquete_serializado).decode('ascii')
+        paquete = bytearray(self.MAGIC)
+        paquete.append(self.VERSION)
+        paquete += _escribir_varint(len(simbolos))
+        previo = 0
+        for char in simbolos:
+            paquete += _escribir_varint(ord(char) - previo)
+            previo = ord(char)
+        paquete += bytes(longitudes[char] for char in simbolos)
+        paquete += _escribir_varint(n_bits)
+        paquete += datos
+        return bytes(paquete)
     
-    def descomprimir_desde_bytes(self, paquete_b64):
-        # Desempaqueta y descomprime
+    def leer_paquete(self, paquete):
+        # Devuelve (longitudes, n_bits, datos) sin copiar: datos es una vista sobre el paquete
+        vista = memoryview(paquete)
+        if vista[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError("No es un paquete Huffman")
         try:
-            paquete_serializado = base64.b64decode(paquete_b64.encode('ascii'))
-            paquete = pickle.loads(paquete_serializado)
-            
-            frecuencias = paquete['frecuencias']
-            padding = paquete['padding']
-            datos = paquete['datos']
-            
-            bits = ''.join(format(byte, '08b') for byte in datos)
-            
-            if padding > 0:
-                bits = bits[:-padding]
-            
-            return self.descomprimir(bits, frecuencias)
-        except Exception as e:
+            pos = len(self.MAGIC)
+            if vista[pos] != self.VERSION:
+                raise ValueError(f"Versión no soportada: {vista[pos]}")
+            n, pos = _leer_varint(vista, pos + 1)
+            simbolos = []
+            previo = 0
+            for _ in range(n):
+                delta, pos = _leer_varint(vista, pos)
+                previo += delta
+                # Los símbolos van en orden estricto y deben ser puntos de código válidos
+                if (simbolos and delta == 0) or previo > 0x10FFFF:
+                    raise ValueError("Paquete Huffman corrupto")
+                simbolos.append(chr(previo))
+            longitudes = vista[pos:pos + n]
+            n_bits, pos = _leer_varint(vista, pos + n)
+        except IndexError:
+            raise ValueError("Paquete Huffman truncado")
+        datos = vista[pos:]
+        if len(longitudes) < n or len(datos) * 8 < n_bits:
+            raise ValueError("Paquete Huffman truncado")
+        if 0 in longitudes or (n > 1 and sum(2.0 ** -l for l in longitudes) > 1):
+            raise ValueError("Tabla de longitudes inválida")
+        return dict(zip(simbolos, longitudes)), n_bits, datos
+    
+    def descomprimir_desde_bytes(self, paquete):
+        # Desempaqueta y descomprime (paquete: bytes, bytearray o memoryview)
+        try:
+            longitudes, n_bits, datos = self.leer_paquete(paquete)
+            self.codigos = self.codigos_canonicos(longitudes)
+            return self.descomprimir(datos, n_bits, longitudes)
+        except (ValueError, TypeError) as e:
             print(f"Error descomprimiendo Huffman: {e}")
             return None
 
@@ -173,43 +406,67 @@ class LSBDetector:
             salida.extend(self.extraer_bits_divide_y_venceras(bloque, umbral_base))
         return salida
 
+    # ---------------------------------------------------------------
+    # VECTORIZADO (NumPy)
+    # ---------------------------------------------------------------
+    def extraer_bits_vectorizado(self, canal_2d):
+        """
+        Extrae LSB de todo el canal en una sola operación y los empaqueta
+        (8 píxeles por byte) en un arreglo uint8, en orden fila por fila.
+        """
+        bits = np.bitwise_and(canal_2d, 1).reshape(-1)
+        bits = bits[:bits.size - bits.size % 8]
+        return np.packbits(bits)
+
 
     # ---------------------------------------------------------------
     # PRUEBAS ESTADÍSTICAS
     # ---------------------------------------------------------------
-    def prueba_chi_cuadrado(self, datos_canal_plano):
-        pares_observados = []
-        pares_esperados = []
-        for i in range(0, 256, 2):
-            if i + 1 < 256:
-                conteo_par = np.sum(datos_canal_plano == i)
-                conteo_impar = np.sum(datos_canal_plano == i + 1)
-                pares_observados.extend([conteo_par, conteo_impar])
-                esperado = (conteo_par + conteo_impar) / 2
-                pares_esperados.extend([esperado, esperado])
-        pares_observados = np.array(pares_observados)
-        pares_esperados = np.array(pares_esperados)
+    def calcular_histograma(self, canal_plano):
+        """Histograma de 256 valores en una sola pasada (np.bincount)."""
+        return np.bincount(np.asarray(canal_plano, dtype=np.uint8).ravel(), minlength=256)
+
+    def prueba_chi_cuadrado(self, datos_canal_plano, histograma=None):
+        if histograma is None:
+            histograma = self.calcular_histograma(datos_canal_plano)
+        pares_observados = histograma[:256]
+        pares_esperados = np.repeat((histograma[0:256:2] + histograma[1:256:2]) / 2, 2)
         mascara = pares_esperados > 0
         chi2 = np.sum((pares_observados[mascara] - pares_esperados[mascara])**2 / pares_esperados[mascara])
         grados_libertad = len(pares_observados[mascara]) - 1
         valor_p = 1 - stats.chi2.cdf(chi2, grados_libertad) if grados_libertad > 0 else 1
         return chi2, valor_p, grados_libertad
 
-    def analisis_lsb(self, canal_plano):
+    def analisis_lsb(self, canal_plano, histograma=None):
         bits_lsb = canal_plano & 1
+        if histograma is not None:
+            total = histograma.sum()
+            unos = histograma[1::2].sum()
+            media = unos / total
+            varianza = media * (1 - media)
+            entropia = self.calcular_entropia(None, conteos=np.array([total - unos, unos]))
+        else:
+            media = np.mean(bits_lsb)
+            varianza = np.var(bits_lsb)
+            entropia = self.calcular_entropia(bits_lsb)
         estadisticas_lsb = {
-            'media': np.mean(bits_lsb),
-            'varianza': np.var(bits_lsb),
-            'entropia': self.calcular_entropia(bits_lsb),
+            'media': media,
+            'varianza': varianza,
+            'entropia': entropia,
             'prueba_rachas': self.prueba_rachas(bits_lsb),
             'media_esperada': 0.5,
             'varianza_esperada': 0.25
         }
         return estadisticas_lsb
 
-    def calcular_entropia(self, datos):
-        unicos, conteos = np.unique(datos, return_counts=True)
-        probabilidades = conteos / len(datos)
+    def calcular_entropia(self, datos, conteos=None):
+        if conteos is None:
+            if datos.dtype.kind in 'ub':
+                conteos = np.bincount(np.asarray(datos, dtype=np.intp).ravel())
+            else:
+                unicos, conteos = np.unique(datos, return_counts=True)
+        conteos = conteos[conteos > 0]
+        probabilidades = conteos / conteos.sum()
         entropia = -np.sum(probabilidades * np.log2(probabilidades + 1e-8))
         return entropia
 
@@ -217,11 +474,10 @@ class LSBDetector:
         n = len(secuencia_binaria)
         if n == 0:
             return 0, 1
-        rachas = 1
-        for i in range(1, n):
-            if secuencia_binaria[i] != secuencia_binaria[i-1]:
-                rachas += 1
-        unos = np.sum(secuencia_binaria)
+        secuencia_binaria = np.asarray(secuencia_binaria).reshape(-1)
+        # Cada cambio entre posiciones consecutivas abre una racha nueva
+        rachas = 1 + int(np.count_nonzero(secuencia_binaria[1:] != secuencia_binaria[:-1]))
+        unos = int(np.count_nonzero(secuencia_binaria))
         ceros = n - unos
         if unos == 0 or ceros == 0:
             return rachas, 1
@@ -277,8 +533,9 @@ class LSBDetector:
         print("\nANALISIS ESTADISTICO (Canal Rojo):")
         canal = self.imagen[:, :, 0]
         plano = canal.flatten()
-        chi2, valor_p_chi, grados_libertad = self.prueba_chi_cuadrado(plano)
-        estadisticas_lsb = self.analisis_lsb(plano)
+        histograma = self.calcular_histograma(plano)
+        chi2, valor_p_chi, grados_libertad = self.prueba_chi_cuadrado(plano, histograma)
+        estadisticas_lsb = self.analisis_lsb(plano, histograma)
         correlacion_h, correlacion_v = self.analisis_correlacion_espacial(canal)
         sospecha = self.calcular_puntuacion_sospecha(valor_p_chi, estadisticas_lsb, correlacion_h, correlacion_v)
 
@@ -319,9 +576,10 @@ class LSBDetector:
         tiempos_dyv_promedio = []
         tiempos_fb_desv = []
         tiempos_dyv_desv = []
+        tiempos_vec_promedio = []
         
         print("\n" + "="*70)
-        print("BENCHMARK: n vs tiempo (Fuerza Bruta vs Divide y Venceras)")
+        print("BENCHMARK: n vs tiempo (Fuerza Bruta vs Divide y Venceras vs Vectorizado)")
         print("="*70)
         print(f"Repeticiones por tamaño: {repeticiones}")
         print(f"Tamaños a probar: {tamaños}")
@@ -334,6 +592,7 @@ class LSBDetector:
             
             tiempos_fb_temp = []
             tiempos_dyv_temp = []
+            tiempos_vec_temp = []
             
             for rep in range(repeticiones):
                 t0 = time.time()
@@ -348,7 +607,12 @@ class LSBDetector:
                 tiempo_dyv = t3 - t2
                 tiempos_dyv_temp.append(tiempo_dyv)
                 
-                print(f"  Rep {rep+1}/{repeticiones}: FB={tiempo_fb:.5f}s | DyV={tiempo_dyv:.5f}s")
+                t4 = time.time()
+                _ = self.extraer_bits_vectorizado(redimensionada)
+                tiempo_vec = time.time() - t4
+                tiempos_vec_temp.append(tiempo_vec)
+                
+                print(f"  Rep {rep+1}/{repeticiones}: FB={tiempo_fb:.5f}s | DyV={tiempo_dyv:.5f}s | Vec={tiempo_vec:.5f}s")
             
             fb_promedio = np.mean(tiempos_fb_temp)
             dyv_promedio = np.mean(tiempos_dyv_temp)
@@ -360,12 +624,14 @@ class LSBDetector:
             tiempos_dyv_promedio.append(dyv_promedio)
             tiempos_fb_desv.append(fb_desv)
             tiempos_dyv_desv.append(dyv_desv)
+            tiempos_vec_promedio.append(np.mean(tiempos_vec_temp))
             
             aceleracion = fb_promedio / dyv_promedio if dyv_promedio > 0 else 0
             mejora_porcentual = ((fb_promedio - dyv_promedio) / fb_promedio * 100) if fb_promedio > 0 else 0
             
             print(f"  Promedio FB: {fb_promedio:.5f}s (desv: {fb_desv:.5f}s)")
             print(f"  Promedio DyV: {dyv_promedio:.5f}s (desv: {dyv_desv:.5f}s)")
+            print(f"  Promedio Vectorizado: {tiempos_vec_promedio[-1]:.5f}s")
             print(f"  Aceleracion: {aceleracion:.2f}x | Mejora: {mejora_porcentual:.1f}%")
 
         ns = np.array(ns)
@@ -373,6 +639,7 @@ class LSBDetector:
         tiempos_dyv_promedio = np.array(tiempos_dyv_promedio)
         tiempos_fb_desv = np.array(tiempos_fb_desv)
         tiempos_dyv_desv = np.array(tiempos_dyv_desv)
+        tiempos_vec_promedio = np.array(tiempos_vec_promedio)
         
         # Crear graficos
         plt.figure(figsize=(14, 8))
@@ -385,6 +652,8 @@ class LSBDetector:
         plt.errorbar(ns, tiempos_dyv_promedio, yerr=tiempos_dyv_desv, 
                     fmt='g-s', linewidth=2, markersize=8, capsize=5, 
                     label='Divide y Venceras O(n)', alpha=0.8)
+        plt.plot(ns, tiempos_vec_promedio, 'b-^', linewidth=2, markersize=8,
+                 label='Vectorizado (NumPy)', alpha=0.8)
         plt.xlabel('n (numero de pixeles)', fontsize=8)
         plt.ylabel('Tiempo (segundos)', fontsize=8)
         plt.title('Comparacion Temporal: Fuerza Bruta vs Divide y Venceras\n(Escala Lineal)', 
@@ -398,6 +667,8 @@ class LSBDetector:
                   label='Fuerza Bruta', alpha=0.8)
         plt.loglog(ns, tiempos_dyv_promedio, 'g-s', linewidth=2, markersize=8, 
                   label='Divide y Venceras', alpha=0.8)
+        plt.loglog(ns, tiempos_vec_promedio, 'b-^', linewidth=2, markersize=8, 
+                  label='Vectorizado', alpha=0.8)
         
         referencia_lineal = ns / ns[0] * tiempos_fb_promedio[0]
         plt.loglog(ns, referencia_lineal, 'k--', linewidth=1.5, alpha=0.5, label='O(n) teorico')
@@ -493,6 +764,10 @@ class LSBDetector:
         print(f"   Tiempo promedio: {np.mean(tiempos_dyv_promedio):.5f}s")
         print(f"   Coeficiente lineal: {parametros_dyv[0]:.2e}")
         
+        print("\nVECTORIZADO (NumPy):")
+        print(f"   Tiempo promedio: {np.mean(tiempos_vec_promedio):.5f}s")
+        print(f"   Aceleracion promedio vs FB: {np.mean(tiempos_fb_promedio / np.maximum(tiempos_vec_promedio, 1e-9)):.1f}x")
+        
         print(f"\nCOMPARACION:")
         print(f"   Aceleracion promedio: {np.mean(aceleraciones):.2f}x")
         print(f"   Aceleracion maxima: {np.max(aceleraciones):.2f}x (n={ns[np.argmax(aceleraciones)]:,})")
@@ -552,6 +827,14 @@ class EsteganografiaLSB:
             print(f"Error descomprimiendo zlib: {e}")
             return None
     
+    @staticmethod
+    def mensaje_a_bits(marcador, contenido):
+        """Bits de marcador + contenido + ':END' (texto en UTF-8; bytes tal cual)"""
+        if isinstance(contenido, str):
+            contenido = contenido.encode('utf-8')
+        datos = marcador.encode('ascii') + contenido + b":END"
+        return ''.join(format(b, '08b') for b in datos)
+    
     @staticmethod
     def crear_imagen_con_mensaje(mensaje, nombre_archivo="imagen_con_mensaje.png", metodo_compresion='ninguno'):
         """Crea imagen nueva con mensaje oculto"""
@@ -568,7 +851,7 @@ class EsteganografiaLSB:
                 if mensaje_procesado is None:
                     return False
                 marcador = "HUFFMAN:"
-                print(f"Tamaño comprimido: {len(mensaje_procesado)} caracteres")
+                print(f"Tamaño comprimido: {len(mensaje_procesado)} bytes")
                 print(f"Ratio: {len(mensaje)/len(mensaje_procesado):.2f}x")
                 
             elif metodo_compresion == 'zlib':
@@ -583,8 +866,7 @@ class EsteganografiaLSB:
                 mensaje_procesado = mensaje
                 marcador = "PLAIN:"
             
-            mensaje_final = marcador + mensaje_procesado + ":END"
-            mensaje_binario = ''.join(format(ord(c), '08b') for c in mensaje_final)
+            mensaje_binario = EsteganografiaLSB.mensaje_a_bits(marcador, mensaje_procesado)
             
             if len(mensaje_binario) > ancho * alto:
                 print(f"Mensaje demasiado largo: {len(mensaje_binario)} bits > {ancho * alto}")
@@ -632,7 +914,7 @@ class EsteganografiaLSB:
                 if mensaje_procesado is None:
                     return False
                 marcador = "HUFFMAN:"
-                print(f"Tamaño comprimido: {len(mensaje_procesado)} caracteres")
+                print(f"Tamaño comprimido: {len(mensaje_procesado)} bytes")
                 print(f"Ratio: {len(mensaje)/len(mensaje_procesado):.2f}x")
                 
             elif metodo_compresion == 'zlib':
@@ -648,8 +930,7 @@ class EsteganografiaLSB:
                 marcador = "PLAIN:"
             
             # Preparar mensaje final
-            mensaje_final = marcador + mensaje_procesado + ":END"
-            mensaje_binario = ''.join(format(ord(c), '08b') for c in mensaje_final)
+            mensaje_binario = EsteganografiaLSB.mensaje_a_bits(marcador, mensaje_procesado)
             
             if len(mensaje_binario) > ancho * alto:
                 print(f"Mensaje demasiado largo: {len(mensaje_binario)} bits > {ancho * alto}")
@@ -0,0 +1,123 @@
+import itertools
+import random
+
+import pytest
+
+import lsb_detector_huffman as lsb
+
+TEXTOS = [
+    "a",
+    "aaaaaaaa",
+    "abracadabra",
+    "El veloz murciélago hindú comía feliz cardillo y kiwi. " * 40,
+    "日本語のテキスト、中文文本 y emojis 🎉🐍 " * 30,
+    "sustitutos sueltos \udc80\ud800 y texto normal",
+]
+
+
+def _paquete(puntos, longitudes, n_bits=8, datos=b"\x55"):
+    # Paquete armado a mano, con el mismo formato que comprimir_a_bytes
+    paquete = bytearray(lsb.CompresorHuffman.MAGIC + bytes([lsb.CompresorHuffman.VERSION]))
+    paquete += lsb._escribir_varint(len(puntos))
+    previo = 0
+    for p in puntos:
+        paquete += lsb._escribir_varint(p - previo)
+        previo = p
+    return bytes(paquete + bytes(longitudes) + lsb._escribir_varint(n_bits) + datos)
+
+
+@pytest.mark.parametrize("texto", TEXTOS + [""])
+def test_paquete_ida_y_vuelta(texto):
+    compresor = lsb.CompresorHuffman()
+    paquete = compresor.comprimir_a_bytes(texto)
+    assert lsb.CompresorHuffman().descomprimir_desde_bytes(paquete) == texto
+    assert lsb.EsteganografiaLSB.descomprimir_con_huffman(paquete) == texto
+
+
+def test_un_solo_simbolo():
+    compresor = lsb.CompresorHuffman()
+    datos, n_bits, longitudes = compresor.comprimir("z" * 1000)
+    assert longitudes == {"z": 1} and n_bits == 1000
+    assert compresor.descomprimir(datos, n_bits, longitudes) == "z" * 1000
+
+
+def test_escritor_y_lector_bits():
+    pares = [(i % (1 << (i % 40 + 1)), i % 40 + 1) for i in range(300)]
+    uno_a_uno, lote = lsb.EscritorBits(), lsb.EscritorBits()
+    for v, l in pares:
+        uno_a_uno.escribir(v, l)
+    lote.escribir_codigos(pares)
+    assert uno_a_uno.n_bits == lote.n_bits and uno_a_uno.cerrar() == lote.cerrar()
+    lector = lsb.LectorBits(lote.cerrar(), lote.n_bits)
+    assert [lector.leer(l) for _, l in pares] == [v for v, _ in pares]
+    with pytest.raises(EOFError):
+        lector.leer(1)
+
+
+def test_varint():
+    for n in [0, 1, 127, 128, 300, 2 ** 40]:
+        datos = lsb._escribir_varint(n)
+        assert lsb._leer_varint(datos, 0) == (n, len(datos))
+    with pytest.raises(IndexError):
+        lsb._leer_varint(lsb._escribir_varint(2 ** 20)[:-1], 0)
+
+
+def _costo_minimo(pesos, longitud_maxima):
+    # Fuerza bruta: todas las asignaciones de longitudes que cumplen Kraft
+    mejor = None
+    for longitudes in itertools.product(range(1, longitud_maxima + 1), repeat=len(pesos)):
+        if sum(1 << (longitud_maxima - l) for l in longitudes) <= 1 << longitud_maxima:
+            costo = sum(w * l for w, l in zip(pesos, longitudes))
+            mejor = costo if mejor is None else min(mejor, costo)
+    return mejor
+
+
+def test_package_merge_igual_que_fuerza_bruta():
+    rng = random.Random(5)
+    compresor = lsb.CompresorHuffman()
+    for _ in range(60):
+        n = rng.randint(2, 6)
+        longitud_maxima = rng.randint((n - 1).bit_length(), 5)
+        pesos = sorted(rng.choice([1, 2, 3, 50, 1000]) for _ in range(n))
+        longitudes = compresor._package_merge(list(range(n)), pesos, longitud_maxima)
+        assert max(longitudes.values()) <= longitud_maxima
+        assert sum(w * longitudes[k] for k, w in enumerate(pesos)) == _costo_minimo(pesos, longitud_maxima)
+
+
+def test_longitud_maxima_respetada():
+    # Frecuencias de Fibonacci: el Huffman óptimo da códigos de hasta n-1 bits
+    fib = [1, 1]
+    while len(fib) < 24:
+        fib.append(fib[-1] + fib[-2])
+    texto = ''.join(chr(0x41 + i) * f for i, f in enumerate(fib))
+    compresor = lsb.CompresorHuffman()
+    compresor.LONGITUD_MAXIMA = 10
+    datos, n_bits, longitudes = compresor.comprimir(texto)
+    assert max(longitudes.values()) == 10
+    assert compresor.descomprimir(datos, n_bits, longitudes) == texto
+
+
+def test_paquete_truncado():
+    paquete = lsb.CompresorHuffman().comprimir_a_bytes(TEXTOS[3])
+    for largo in range(len(paquete)):
+        with pytest.raises(ValueError):
+            lsb.CompresorHuffman().leer_paquete(paquete[:largo])
+        assert lsb.CompresorHuffman().descomprimir_desde_bytes(paquete[:largo]) is None
+
+
+@pytest.mark.parametrize("puntos, longitudes", [
+    ([97, 98, 99], [1, 1, 1]),    # No cumple Kraft
+    ([97, 98], [0, 1]),           # Longitud cero
+    ([97, 97], [1, 1]),           # Símbolo repetido
+    ([97, 0x110000], [1, 1]),     # Fuera de Unicode
+])
+def test_paquete_con_tabla_invalida(puntos, longitudes):
+    with pytest.raises(ValueError):
+        lsb.CompresorHuffman().leer_paquete(_paquete(puntos, longitudes))
+
+
+def test_datos_que_no_forman_codigos():
+    # Con la tabla incompleta {a: 0, b: 10}, los bits 11 no son ningún código
+    with pytest.raises(ValueError):
+        lsb.CompresorHuffman().descomprimir(b"\xc0", 2, {"a": 1, "b": 2})
+
@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from huffman import LSBDetector, ContextoAnalisis, CacheResultados
+
+
+EXTENSIONES = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
+
+CAMPOS = ['archivo', 'alto', 'ancho', 'prefiltro', 'mensaje_estandar', 'mensaje_huffman',
+          'chi2', 'p_chi2', 'media_lsb', 'varianza_lsb', 'entropia_lsb',
+          'correlacion_h', 'correlacion_v', 'correlacion_diag', 'correlacion_antidiag',
+          'correlacion_min_bloque', 'tasa_spa', 'tasa_rs', 'sospecha', 'estado', 'en_cache', 'tiempo_s', 'error']
+
+
+def buscar_imagenes(directorio):
+    # Recorre el árbol de directorios completo (no solo la carpeta actual)
+    for raiz, _, archivos in os.walk(directorio):
+        for nombre in sorted(archivos):
+            if nombre.lower().endswith(EXTENSIONES):
+                yield os.path.join(raiz, nombre)
+
+
+def _finito(valor):
+    # NaN (p. ej. correlación de una imagen constante) se guarda vacío para que el JSON siga siendo válido
+    return float(valor) if np.isfinite(valor) else None
+
+
+# Una CacheResultados por proceso y carpeta: conserva el contador de tamaño entre imágenes
+# (una instancia nueva por imagen recorrería toda la caché en cada guardado)
+_caches = {}
+
+
+def _cache_del_proceso(dir_cache, limite_cache):
+    if (dir_cache, limite_cache) not in _caches:
+        _caches[dir_cache, limite_cache] = CacheResultados(dir_cache, limite_cache)
+    return _caches[dir_cache, limite_cache]
+
+
+def analizar_archivo(ruta, dir_cache=None, limite_cache=256 * 2**20):
+    # Se ejecuta en cada proceso del pool: extracción + pruebas estadísticas de una imagen
+    inicio = time.time()
+    cache = clave = None
+    if dir_cache:
+        cache = _cache_del_proceso(dir_cache, limite_cache)
+        try:
+            clave = cache.clave(ruta, 'fila')
+            fila = cache.obtener(clave)
+        except OSError:
+            fila = None
+        if fila is not None:
+            fila.update({'archivo': ruta, 'en_cache': True, 'tiempo_s': round(time.time() - inicio, 5)})
+            return fila
+    fila = _analizar(ruta)
+    fila['en_cache'] = False
+    if clave is not None and not fila['error']:
+        cache.guardar(clave, fila)
+    fila['tiempo_s'] = round(time.time() - inicio, 5)
+    return fila
+
+
+def _analizar(ruta):
+    fila = {campo: None for campo in CAMPOS}
+    fila['archivo'] = ruta
+    detector = LSBDetector()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                contexto = ContextoAnalisis.desde_archivo(ruta)
+            except ValueError:
+                fila['error'] = "No se pudo cargar la imagen"
+                return fila
+            hallazgos = detector.prefiltro_lsb(contexto.imagen)
+            canal = contexto.canal(0)
+            flat = contexto.canal_plano(0)
+            histograma = contexto.histograma(0)
+            chi2, pchi, _ = detector.chi_square_test(flat, histograma)
+            lsb_stats = detector.lsb_analysis(flat, contexto.bits_lsb(0), histograma)
+            corr, mapa = detector.correlacion_por_bloques(canal)
+            hc, vc = corr['horizontal'], corr['vertical']
+            spa = detector.sample_pair_analysis(canal)
+            rs = detector.rs_analysis(canal)
+            sospecha = detector.calculate_suspicion_score(pchi, lsb_stats, hc, vc, spa, rs)
+
+            # Extracción completa solo con huella en el prefiltro o sospecha estadística
+            mensaje = mensaje_huffman = None
+            if hallazgos or sospecha > 0.4:
+                canal_huffman = next((c for c, f in hallazgos if f in ('huffman', 'multiplano')), 0)
+                mensaje = detector.extraer_mensaje_lsb(ruta, 'streaming', contexto)
+                mensaje_huffman, _ = detector.extraer_mensaje_huffman(ruta, 'vectorizado', canal_huffman, contexto)
+
+        if mensaje or mensaje_huffman:
+            estado = "DETECTADA"
+        elif sospecha > 0.4:
+            estado = "SOSPECHOSO"
+        else:
+            estado = "NORMAL"
+
+        fila.update({
+            'alto': int(canal.shape[0]),
+            'ancho': int(canal.shape[1]),
+            'prefiltro': ';'.join(f"{c}:{f}" for c, f in hallazgos),
+            'mensaje_estandar': mensaje,
+            'mensaje_huffman': mensaje_huffman,
+            'chi2': _finito(chi2),
+            'p_chi2': _finito(pchi),
+            'media_lsb': _finito(lsb_stats['mean']),
+            'varianza_lsb': _finito(lsb_stats['variance']),
+            'entropia_lsb': _finito(lsb_stats['entropy']),
+            'correlacion_h': _finito(hc),
+            'correlacion_v': _finito(vc),
+            'correlacion_diag': _finito(corr['diagonal']),
+            'correlacion_antidiag': _finito(corr['antidiagonal']),
+            'correlacion_min_bloque': _finito(np.nanmin(mapa)) if np.isfinite(mapa).any() else None,
+            'tasa_spa': _finito(spa),
+            'tasa_rs': _finito(rs),
+            'sospecha': _finito(sospecha),
+            'estado': estado,
+        })
+    except Exception as e:
+        fila['error'] = str(e)
+    return fila
+
+
+def escanear_directorio(directorio, ruta_salida, procesos=None, tam_lote=8, dir_cache=None,
+                        limite_cache=256 * 2**20):
+    """
+    Analiza en paralelo todas las imágenes bajo `directorio` y escribe una fila por imagen.
+    El formato de salida depende de la extensión: .jsonl/.json (JSON por línea) o CSV.
+    Con `dir_cache` las imágenes ya analizadas (mismo contenido) se leen de la caché.
+    """
+    rutas = list(buscar_imagenes(directorio))
+    if not rutas:
+        print(f"No se encontraron imágenes en {directorio}")
+        return {}
+
+    print(f"Escaneando {len(rutas)} imágenes con {procesos or os.cpu_count()} procesos...")
+    como_json = ruta_salida.lower().endswith(('.jsonl', '.json'))
+    resumen = {'DETECTADA': 0, 'SOSPECHOSO': 0, 'NORMAL': 0, 'ERROR': 0}
+    aciertos = 0
+    tarea = partial(analizar_archivo, dir_cache=dir_cache, limite_cache=limite_cache)
+    inicio = time.time()
+
+    with open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
+        escritor = None if como_json else csv.DictWriter(f, fieldnames=CAMPOS)
+        if escritor:
+            escritor.writeheader()
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            for fila in pool.map(tarea, rutas, chunksize=tam_lote):
+                if como_json:
+                    f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+                else:
+                    escritor.writerow(fila)
+                resumen['ERROR' if fila['error'] else fila['estado']] += 1
+                aciertos += bool(fila['en_cache'])
+
+    total = time.time() - inicio
+    print(f"Escaneo terminado en {total:.2f} s ({len(rutas) / total:.1f} imágenes/s)")
+    for estado, cantidad in resumen.items():
+        print(f"  {estado}: {cantidad}")
+    if dir_cache:
+        print(f"  Recuperadas de caché: {aciertos}")
+    print(f"Resultados: {ruta_salida}")
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escaneo por lotes de esteganografía LSB")
+    parser.add_argument("directorio", help="Carpeta raíz a recorrer (recursivo)")
+    parser.add_argument("-o", "--salida", default="resultados_lsb.csv",
+                        help="Archivo de resultados (.csv o .jsonl)")
+    parser.add_argument("-p", "--procesos", type=int, default=None,
+                        help="Número de procesos (default: núcleos disponibles)")
+    parser.add_argument("--cache", default=None,
+                        help="Carpeta de caché de resultados (por contenido de la imagen)")
+    parser.add_argument("--cache-mb", type=int, default=256,
+                        help="Tamaño máximo de la caché en MB (default: 256)")
+    args = parser.parse_args()
+    escanear_directorio(args.directorio, args.salida, args.procesos,
+                        dir_cache=args.cache, limite_cache=args.cache_mb * 2**20)
+
+
+if __name__ == "__main__":
+    main()
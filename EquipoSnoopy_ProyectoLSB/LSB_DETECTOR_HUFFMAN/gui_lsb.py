@@ -98,6 +98,10 @@ class LSBDetectorGUI:
                           lambda: self.extraer_mensaje('fuerza_bruta')).pack(side=tk.LEFT, padx=5)
         self.create_button(btn_frame2, "Divide y Vencerás", 
                           lambda: self.extraer_mensaje('divide_y_venceras')).pack(side=tk.LEFT, padx=5)
+        self.create_button(btn_frame2, "Vectorizado", 
+                          lambda: self.extraer_mensaje('vectorizado')).pack(side=tk.LEFT, padx=5)
+        self.create_button(btn_frame2, "Streaming", 
+                          lambda: self.extraer_mensaje('streaming')).pack(side=tk.LEFT, padx=5)
         
         results_frame = ttk.Frame(tab, padding="10")
         results_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -219,6 +223,13 @@ class LSBDetectorGUI:
                        value="1").pack(side=tk.LEFT, padx=5)
         ttk.Radiobutton(canal_frame, text="Azul (2)", variable=self.canal_var, 
                        value="2").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(canal_frame, text="RGB (0+1+2)", variable=self.canal_var, 
+                       value="rgb").pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(canal_frame, text="Bits por canal:", style='Info.TLabel').pack(side=tk.LEFT, padx=(15, 5))
+        self.bits_var = tk.StringVar(value="1")
+        ttk.Spinbox(canal_frame, from_=1, to=4, width=3, textvariable=self.bits_var, 
+                    state='readonly').pack(side=tk.LEFT, padx=5)
         
         ttk.Label(content_frame, text="Nombre del archivo de salida:", 
                  style='Info.TLabel').pack(anchor=tk.W, pady=(10, 5))
@@ -367,7 +378,10 @@ class LSBDetectorGUI:
         
         mensaje = self.entry_mensaje_huffman.get(1.0, tk.END).strip()
         salida = self.entry_salida_huffman.get().strip()
-        canal = int(self.canal_var.get())
+        canal_sel = self.canal_var.get()
+        canales = [0, 1, 2] if canal_sel == "rgb" else None
+        canal = 0 if canal_sel == "rgb" else int(canal_sel)
+        bits_por_canal = int(self.bits_var.get())
         
         if not mensaje:
             messagebox.showwarning("Advertencia", "Ingresa un mensaje")
@@ -376,7 +390,8 @@ class LSBDetectorGUI:
         if not salida:
             salida = "imagen_huffman_estego.png"
         
-        if self.detector.ocultar_mensaje_huffman(self.imagen_entrada, mensaje, salida, canal):
+        if self.detector.ocultar_mensaje_huffman(self.imagen_entrada, mensaje, salida, canal,
+                                                 canales=canales, bits_por_canal=bits_por_canal):
             messagebox.showinfo("Éxito", f"Mensaje oculto con Huffman en: {salida}")
         else:
             messagebox.showerror("Error", "No se pudo ocultar el mensaje")
@@ -8,71 +8,318 @@ import time
 import heapq
 from collections import Counter
 import json
+import tracemalloc
+import hashlib
+import zlib
 
 
-class NodoHuffman:
-    
-    def __init__(self, caracter=None, frecuencia=0, izquierda=None, derecha=None):
-        self.caracter = caracter
-        self.frecuencia = frecuencia
-        self.izquierda = izquierda
-        self.derecha = derecha
-    
-    def __lt__(self, otro):
-        return self.frecuencia < otro.frecuencia
-    
-    def __eq__(self, otro):
-        return self.frecuencia == otro.frecuencia
+def _escribir_varint(n):
+    # Entero sin signo en base 128 (LEB128): 7 bits por byte, bit alto = "siguen más bytes"
+    salida = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            salida.append(byte | 0x80)
+        else:
+            salida.append(byte)
+            return bytes(salida)
+
+
+def _leer_varint(datos, pos):
+    # Devuelve (valor, posición siguiente); IndexError si los datos terminan a mitad del número
+    valor = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[pos]
+        pos += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor, pos
+        desplazamiento += 7
+        if desplazamiento > 63:
+            raise ValueError("Varint demasiado largo")
+
+
+class EscritorBits:
+    # Escribe códigos de longitud variable (bit más significativo primero) en un bytearray.
+    # Los bits pendientes viven en un acumulador de menos de 64 bits que se vuelca de 8 en 8 bytes.
+
+    def __init__(self):
+        self.datos = bytearray()
+        self.acumulador = 0
+        self.pendientes = 0
+
+    @property
+    def n_bits(self):
+        return len(self.datos) * 8 + self.pendientes
+
+    def escribir(self, valor, longitud):
+        self.acumulador = (self.acumulador << longitud) | valor
+        self.pendientes += longitud
+        if self.pendientes >= 64:
+            self.pendientes -= 64
+            self.datos += (self.acumulador >> self.pendientes).to_bytes(8, 'big')
+            self.acumulador &= (1 << self.pendientes) - 1
+
+    def escribir_lote(self, valores, longitudes):
+        # Igual que escribir() para cada par (valor, longitud ≤ 64), pero con NumPy. Los bits
+        # pendientes del acumulador van delante como un código más; cada código se ubica en su
+        # palabra de 64 bits y, si no cabe, el sobrante pasa al comienzo de la palabra siguiente.
+        valores = np.concatenate((np.array([self.acumulador], dtype=np.uint64),
+                                  np.asarray(valores, dtype=np.uint64)))
+        longitudes = np.concatenate(([self.pendientes], np.asarray(longitudes, dtype=np.int64)))
+        fines = np.cumsum(longitudes)
+        inicios = fines - longitudes
+        total = int(fines[-1])
+        palabra = inicios >> 6
+        libres = 64 - (inicios & 63)
+        cabe = longitudes <= libres
+        desplazamiento = np.where(cabe, libres - longitudes, longitudes - libres).astype(np.uint64)
+        partes = np.where(cabe, valores << desplazamiento, valores >> desplazamiento)
+        palabras = np.zeros(-(-total // 64) + 1, dtype=np.uint64)
+        grupos = np.flatnonzero(np.r_[True, palabra[1:] != palabra[:-1]])
+        palabras[palabra[grupos]] = np.bitwise_or.reduceat(partes, grupos)
+        cruzan = np.flatnonzero(~cabe)
+        sobrante = (64 + libres[cruzan] - longitudes[cruzan]).astype(np.uint64)
+        palabras[palabra[cruzan] + 1] |= valores[cruzan] << sobrante
+        datos = palabras.astype('>u8').tobytes()
+        self.datos += datos[:total // 8]
+        self.pendientes = total % 8
+        self.acumulador = datos[total // 8] >> (8 - self.pendientes) if self.pendientes else 0
+
+    def cerrar(self):
+        # Bytes escritos, con el último byte completado con ceros
+        relleno = -self.pendientes % 8
+        return bytes(self.datos) + (self.acumulador << relleno).to_bytes((self.pendientes + relleno) // 8, 'big')
+
+
+class LectorBits:
+    # Lee de a `longitud` bits (bit más significativo primero) de los primeros n_bits de datos,
+    # recargando un acumulador de 8 en 8 bytes
+
+    def __init__(self, datos, n_bits=None):
+        self.datos = memoryview(bytes(datos) if not isinstance(datos, (bytes, bytearray)) else datos)
+        self.n_bits = len(self.datos) * 8 if n_bits is None else min(n_bits, len(self.datos) * 8)
+        self.posicion = 0
+        self.acumulador = 0
+        self.disponibles = 0
+        self.siguiente_byte = 0
+
+    def restantes(self):
+        return self.n_bits - self.posicion
+
+    def leer(self, longitud):
+        if longitud > self.restantes():
+            raise EOFError("No quedan suficientes bits")
+        while self.disponibles < longitud:
+            trozo = self.datos[self.siguiente_byte:self.siguiente_byte + 8]
+            self.acumulador = (self.acumulador << (8 * len(trozo))) | int.from_bytes(trozo, 'big')
+            self.disponibles += 8 * len(trozo)
+            self.siguiente_byte += len(trozo)
+        self.disponibles -= longitud
+        self.posicion += longitud
+        valor = self.acumulador >> self.disponibles
+        self.acumulador &= (1 << self.disponibles) - 1
+        return valor
+
+
+def _simbolo_utf8(simbolo):
+    # Bytes que aporta un símbolo al texto decodificado: un carácter en UTF-8 o un byte tal cual
+    return simbolo if isinstance(simbolo, bytes) else simbolo.encode('utf-8', 'surrogatepass')
+
+
+class TextoEscalonado:
+    # Lista de cadenas de bytes de distinto largo guardadas una tras otra en un solo arreglo,
+    # para poder concatenar muchas de ellas (por índice) con operaciones NumPy
+
+    def __init__(self, partes, largos=None):
+        if largos is None:
+            largos = [len(p) for p in partes]
+            partes = np.frombuffer(b''.join(partes), dtype=np.uint8)
+        self.plano = partes
+        self.largos = np.asarray(largos, dtype=np.int64)
+        self.inicios = np.cumsum(self.largos) - self.largos
+
+    def reunir(self, indices):
+        largos = self.largos[indices]
+        destino = np.cumsum(largos) - largos
+        posiciones = np.repeat(self.inicios[indices] - destino, largos)
+        posiciones += np.arange(posiciones.size)
+        return self.plano[posiciones]
 
 
 class CodificadorHuffman:
     
+    # Contenedor binario: MAGIC | versión | flags | tabla canónica | varint bits | CRC32 | datos.
+    # La tabla guarda solo símbolos (deltas de código Unicode en varint) y longitudes de código;
+    # los códigos se reconstruyen de forma canónica. El CRC32 cubre la cabecera y los datos.
+    MAGIC = b"HFB"
+    VERSION_CONTENEDOR = 1
+    FLAG_LONGITUDES_NIBBLE = 0x01
+    # Símbolos = bytes del texto en UTF-8 (alfabeto fijo de 256) en vez de caracteres
+    FLAG_BYTES_UTF8 = 0x02
+    
     def __init__(self):
-        self.raiz = None
         self.codigos = {}
         self.codigos_inversos = {}
     
     def calcular_frecuencias(self, texto):
         return Counter(texto)
     
-    def construir_arbol(self, frecuencias):
-        if not frecuencias:
-            return None
-        heap = [NodoHuffman(caracter=car, frecuencia=freq) for car, freq in frecuencias.items()]
-        heapq.heapify(heap)
-        while len(heap) > 1:
-            izq = heapq.heappop(heap)
-            der = heapq.heappop(heap)
-            padre = NodoHuffman(frecuencia=izq.frecuencia + der.frecuencia, izquierda=izq, derecha=der)
-            heapq.heappush(heap, padre)
-        return heap[0] if heap else None
-    
-    def generar_codigos(self, nodo=None, codigo_actual=""):
-        if nodo is None:
-            nodo = self.raiz
-            self.codigos = {}
-            self.codigos_inversos = {}
-        if nodo is None:
-            return
-        if nodo.caracter is not None:
-            codigo = codigo_actual if codigo_actual else "0"
-            self.codigos[nodo.caracter] = codigo
-            self.codigos_inversos[codigo] = nodo.caracter
-            return
-        if nodo.izquierda:
-            self.generar_codigos(nodo.izquierda, codigo_actual + "0")
-        if nodo.derecha:
-            self.generar_codigos(nodo.derecha, codigo_actual + "1")
+    # Longitud máxima de los códigos que se generan (package-merge si el Huffman óptimo la excede)
+    LONGITUD_MAXIMA = 32
+    
+    def longitudes_codigo(self, frecuencias, longitud_maxima=None):
+        """
+        {símbolo: frecuencia} -> {símbolo: longitud de código} sin construir el árbol: dos colas
+        (hojas ordenadas por frecuencia y nodos internos, que salen ya ordenados) y un arreglo de
+        padres. Con longitud_maxima, si algún código la excede se recalcula con package-merge.
+        """
+        hojas = sorted(frecuencias, key=lambda s: (frecuencias[s], s))
+        n = len(hojas)
+        if n <= 1:
+            return {s: 1 for s in hojas}
+        peso = [frecuencias[s] for s in hojas]
+        padre = [0] * (2 * n - 1)
+        i, j = 0, n  # Frente de la cola de hojas y de la de nodos internos
+        for nuevo in range(n, 2 * n - 1):
+            suma = 0
+            for _ in range(2):
+                if i < n and (j == nuevo or peso[i] <= peso[j]):
+                    k, i = i, i + 1
+                else:
+                    k, j = j, j + 1
+                padre[k] = nuevo
+                suma += peso[k]
+            peso.append(suma)
+        profundidad = [0] * (2 * n - 1)
+        for k in range(2 * n - 3, -1, -1):
+            profundidad[k] = profundidad[padre[k]] + 1
+        if longitud_maxima is not None and max(profundidad[:n]) > longitud_maxima:
+            return self._package_merge(hojas, peso[:n], longitud_maxima)
+        return dict(zip(hojas, profundidad))
+    
+    def _package_merge(self, hojas, pesos, longitud_maxima):
+        # Cada nivel = hojas + paquetes (pares consecutivos) del nivel anterior, ordenados por peso.
+        # Se eligen los 2n-2 primeros del último nivel; la longitud de cada hoja es la cantidad
+        # de niveles en que queda elegida.
+        n = len(hojas)
+        if 1 << longitud_maxima < n:
+            raise ValueError(f"{n} símbolos no caben en códigos de {longitud_maxima} bits")
+        base = [(w, k) for k, w in enumerate(pesos)]
+        niveles = [base]
+        for _ in range(longitud_maxima - 1):
+            previo = niveles[-1]
+            paquetes = [(previo[a][0] + previo[a + 1][0], -1) for a in range(0, len(previo) - 1, 2)]
+            niveles.append(list(heapq.merge(base, paquetes, key=lambda x: x[0])))
+        longitudes = [0] * n
+        tomar = 2 * n - 2
+        for nivel in reversed(niveles):
+            paquetes = 0
+            for _, k in nivel[:tomar]:
+                if k < 0:
+                    paquetes += 1
+                else:
+                    longitudes[k] += 1
+            tomar = 2 * paquetes
+        return dict(zip(hojas, longitudes))
+    
+    def _preparar_codigos(self, texto):
+        # Los códigos salen de las longitudes (sin árbol), así que siempre son canónicos
+        frecuencias = self.calcular_frecuencias(texto)
+        self.codigos = self.codigos_canonicos(self.longitudes_codigo(frecuencias, self.LONGITUD_MAXIMA))
+        self.codigos_inversos = {cod: c for c, cod in self.codigos.items()}
+        return frecuencias
     
     def codificar_texto(self, texto):
+        # Versión con cadena de '0'/'1' (un byte por bit); para mensajes grandes usar codificar_bytes()
         if not texto:
             return "", {}, {}
-        frecuencias = self.calcular_frecuencias(texto)
-        self.raiz = self.construir_arbol(frecuencias)
-        self.generar_codigos()
+        frecuencias = self._preparar_codigos(texto)
         texto_codificado = ''.join(self.codigos[c] for c in texto)
-        longitud_original = len(texto) * 8
-        longitud_comprimida = len(texto_codificado)
+        return texto_codificado, self.codigos, self._estadisticas(len(texto) * 8, len(texto_codificado), len(frecuencias))
+    
+    # Caracteres por lote en codificar_bytes: acota la memoria temporal de la expansión a bits
+    CARACTERES_POR_LOTE = 1 << 16
+    
+    def codificar_bytes(self, texto):
+        """
+        Codifica el texto directamente en bytes empaquetados (MSB primero) con EscritorBits.
+        Retorna (datos, n_bits, codigos, estadisticas); el último byte va completado con ceros.
+        """
+        if not texto:
+            return b"", 0, {}, {}
+        frecuencias = self._preparar_codigos(texto)
+        escritor = EscritorBits()
+        simbolos = sorted(self.codigos)
+        valores = np.array([int(self.codigos[c], 2) for c in simbolos], dtype=np.uint64)
+        longitudes = np.array([len(self.codigos[c]) for c in simbolos], dtype=np.uint64)
+        if longitudes.max() > 64:
+            tabla = {c: (int(cod, 2), len(cod)) for c, cod in self.codigos.items()}
+            for c in texto:
+                escritor.escribir(*tabla[c])
+        else:
+            # Código Unicode -> índice del símbolo: tabla directa en el plano básico, si no búsqueda binaria
+            puntos = np.array([ord(c) for c in simbolos], dtype=np.uint32)
+            directo = None
+            if puntos[-1] < 1 << 16:
+                directo = np.zeros(int(puntos[-1]) + 1, dtype=np.intp)
+                directo[puntos] = np.arange(puntos.size)
+            for i in range(0, len(texto), self.CARACTERES_POR_LOTE):
+                trozo = texto[i:i + self.CARACTERES_POR_LOTE].encode('utf-32-le', 'surrogatepass')
+                trozo = np.frombuffer(trozo, dtype=np.uint32)
+                indices = directo[trozo] if directo is not None else np.searchsorted(puntos, trozo)
+                escritor.escribir_lote(valores[indices], longitudes[indices])
+        n_bits = escritor.n_bits
+        return escritor.cerrar(), n_bits, self.codigos, self._estadisticas(len(texto) * 8, n_bits, len(frecuencias))
+    
+    def longitudes_bytes(self, frecuencias):
+        # Arreglo de 256 frecuencias -> arreglo de 256 longitudes de código (0 = byte ausente)
+        presentes = {int(b): int(frecuencias[b]) for b in np.flatnonzero(frecuencias)}
+        longitudes = np.zeros(256, dtype=np.int64)
+        for b, longitud in self.longitudes_codigo(presentes, self.LONGITUD_MAXIMA).items():
+            longitudes[b] = longitud
+        return longitudes
+    
+    def valores_canonicos_bytes(self, longitudes):
+        # Valor entero del código canónico de cada byte (mismo orden que codigos_canonicos)
+        valores = np.zeros(256, dtype=np.uint64)
+        presentes = {int(b): int(longitudes[b]) for b in np.flatnonzero(longitudes)}
+        for b, codigo in self.codigos_canonicos(presentes).items():
+            valores[b] = int(codigo, 2)
+        return valores
+    
+    def codificar_utf8(self, texto):
+        """
+        Huffman por bytes sobre texto.encode('utf-8'): frecuencias con np.bincount y tablas de 256
+        entradas, así que cualquier carácter Unicode se codifica sin tabla de caracteres.
+        Retorna (datos, n_bits, longitudes, estadisticas); longitudes es el arreglo de 256 entradas.
+        """
+        crudo = np.frombuffer(texto.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+        if not crudo.size:
+            return b"", 0, np.zeros(256, dtype=np.int64), {}
+        frecuencias = np.bincount(crudo, minlength=256)
+        longitudes = self.longitudes_bytes(frecuencias)
+        valores = self.valores_canonicos_bytes(longitudes)
+        escritor = EscritorBits()
+        for i in range(0, crudo.size, self.CARACTERES_POR_LOTE):
+            trozo = crudo[i:i + self.CARACTERES_POR_LOTE]
+            escritor.escribir_lote(valores[trozo], longitudes[trozo])
+        n_bits = escritor.n_bits
+        estadisticas = self._estadisticas(crudo.size * 8, n_bits, int(np.count_nonzero(frecuencias)))
+        return escritor.cerrar(), n_bits, longitudes, estadisticas
+    
+    def decodificar_utf8(self, datos, n_bits, longitudes):
+        # Inverso de codificar_utf8(); UnicodeDecodeError si los bytes recuperados no son UTF-8
+        return self._decodificar(datos, n_bits, self._codigos_bytes(longitudes)).decode('utf-8', 'surrogatepass')
+    
+    def _codigos_bytes(self, longitudes):
+        # {símbolo byte (bytes de largo 1): código} para el autómata de decodificación
+        presentes = {int(b): int(longitudes[b]) for b in np.flatnonzero(longitudes)}
+        return {bytes([b]): codigo for b, codigo in self.codigos_canonicos(presentes).items()}
+    
+    def _estadisticas(self, longitud_original, longitud_comprimida, unicos):
         ratio = longitud_comprimida / longitud_original if longitud_original > 0 else 0
         ahorro = (1 - ratio) * 100
         estadisticas = {
@@ -80,36 +327,770 @@ class CodificadorHuffman:
             'longitud_comprimida_bits': longitud_comprimida,
             'ratio_compresion': ratio,
             'ahorro_porcentual': ahorro,
-            'caracteres_unicos': len(frecuencias)
+            'caracteres_unicos': unicos
         }
-        return texto_codificado, self.codigos, estadisticas
+        return estadisticas
+    
+    # Por debajo de este tamaño armar el autómata cuesta más que decodificar bit a bit
+    BITS_MIN_AUTOMATA = 8192
+    # El autómata ocupa (estados + 1) * 256 entradas; con más estados (alfabetos muy grandes o
+    # una tabla manipulada en la imagen) se decodifica bit a bit, con memoria según los símbolos
+    MAX_ESTADOS_AUTOMATA = 512
     
     def decodificar_texto(self, texto_binario, codigos):
         if not texto_binario or not codigos:
             return ""
-        codigos_inv = {v: k for k, v in codigos.items()}
-        texto_decodificado = []
-        codigo_actual = ""
-        for bit in texto_binario:
-            codigo_actual += bit
-            if codigo_actual in codigos_inv:
-                texto_decodificado.append(codigos_inv[codigo_actual])
-                codigo_actual = ""
-        return ''.join(texto_decodificado)
+        if len(texto_binario) < self.BITS_MIN_AUTOMATA:
+            codigos_inv = {v: k for k, v in codigos.items()}
+            texto_decodificado = []
+            codigo_actual = ""
+            for bit in texto_binario:
+                codigo_actual += bit
+                if codigo_actual in codigos_inv:
+                    texto_decodificado.append(codigos_inv[codigo_actual])
+                    codigo_actual = ""
+            return ''.join(texto_decodificado)
+        bits = np.frombuffer(texto_binario.encode('ascii'), dtype=np.uint8) - ord('0')
+        return self.decodificar_bytes(np.packbits(bits).tobytes(), bits.size, codigos)
+    
+    def tabla_decodificacion(self, codigos):
+        """
+        Autómata para decodificar 8 bits por consulta. Los estados son los prefijos de código
+        incompletos; para cada entrada (estado * 256 + byte) guarda el texto UTF-8 de los símbolos
+        que se completan y el estado siguiente. El último estado es un sumidero para bits que no
+        forman ningún código.
+        """
+        simbolos = list(codigos)
+        ids = {'': 0}
+        for codigo in codigos.values():
+            for i in range(1, len(codigo)):
+                ids.setdefault(codigo[:i], len(ids))
+            if len(ids) > self.MAX_ESTADOS_AUTOMATA:
+                raise ValueError("Demasiados estados para el autómata de decodificación")
+        sumidero = len(ids)
+        # Transición de un bit: (estado, bit) -> estado siguiente, o símbolo completo (y vuelta a 0)
+        es_estado = np.ones((sumidero + 1, 2), dtype=bool)
+        valor = np.full((sumidero + 1, 2), sumidero, dtype=np.int64)
+        for prefijo, e in ids.items():
+            if prefijo:
+                valor[ids[prefijo[:-1]], int(prefijo[-1])] = e
+        for k, codigo in enumerate(codigos.values()):
+            es_estado[ids[codigo[:-1]], int(codigo[-1])] = False
+            valor[ids[codigo[:-1]], int(codigo[-1])] = k
+        # Se aplican los 8 bits de cada byte a todas las entradas a la vez
+        entradas = np.arange((sumidero + 1) * 256)
+        estado = entradas // 256
+        byte = entradas % 256
+        emitidos = np.full((entradas.size, 8), -1, dtype=np.int32)
+        cuantos = np.zeros(entradas.size, dtype=np.int64)
+        for i in range(7, -1, -1):
+            bit = (byte >> i) & 1
+            sigue = es_estado[estado, bit]
+            v = valor[estado, bit]
+            emite = np.flatnonzero(~sigue)
+            emitidos[emite, cuantos[emite]] = v[emite]
+            cuantos[emite] += 1
+            estado = np.where(sigue, v, 0)
+        # Texto de cada entrada = bytes UTF-8 de sus símbolos (o el byte mismo), uno tras otro
+        texto_simbolos = TextoEscalonado([_simbolo_utf8(c) for c in simbolos])
+        ids_emitidos = emitidos[np.arange(8) < cuantos[:, None]]
+        largos = np.add.reduceat(np.r_[texto_simbolos.largos[ids_emitidos], 0],
+                                 np.r_[0, np.cumsum(cuantos)[:-1]])
+        largos[cuantos == 0] = 0
+        textos = TextoEscalonado(texto_simbolos.reunir(ids_emitidos), largos)
+        return textos, estado, (es_estado, valor), simbolos
+    
+    def _estados_por_byte(self, datos, siguientes, max_rondas=64):
+        # Estado del autómata antes de cada byte. Se recorren a la vez muchos tramos del flujo
+        # (una operación NumPy por paso) suponiendo estado 0 al inicio de cada tramo; luego se
+        # repiten solo los tramos cuyo estado inicial real (el final del tramo anterior) difiere.
+        # Los códigos Huffman se resincronizan en pocos bytes, así que casi nunca hace falta más.
+        n = datos.size
+        carriles = min(4096, max(1, n // 256))
+        largo = -(-n // carriles)
+        # Matriz (paso, carril): cada fila es contigua para la operación de cada paso
+        matriz = np.zeros(carriles * largo, dtype=np.int64)
+        matriz[:n] = datos
+        matriz = np.ascontiguousarray(matriz.reshape(carriles, largo).T)
+        estados = np.empty((largo + 1, carriles), dtype=np.int64)
+        estados[0] = 0
+        for j in range(largo):
+            estados[j + 1] = siguientes[estados[j] * 256 + matriz[j]]
+        for _ in range(max_rondas):
+            inicio = np.concatenate(([0], estados[-1, :-1]))
+            cambiados = np.flatnonzero(inicio != estados[0])
+            if not cambiados.size:
+                return estados[:-1].T.reshape(-1)[:n]
+            e = inicio[cambiados]
+            estados[0, cambiados] = e
+            for j in range(largo):
+                e = siguientes[e * 256 + matriz[j, cambiados]]
+                estados[j + 1, cambiados] = e
+        # Código que no se resincroniza: recorrido secuencial
+        tabla = siguientes.tolist()
+        salida = np.empty(n, dtype=np.int64)
+        estado = 0
+        for i, byte in enumerate(datos.tolist()):
+            salida[i] = estado
+            estado = tabla[estado * 256 + byte]
+        return salida
+    
+    def decodificar_bytes(self, datos, n_bits, codigos):
+        # Decodifica los primeros n_bits de datos (MSB primero) con el autómata por bytes
+        return self._decodificar(datos, n_bits, codigos).decode('utf-8', 'surrogatepass')
+    
+    def _decodificar(self, datos, n_bits, codigos):
+        # Igual que decodificar_bytes() pero devuelve los bytes UTF-8 de los símbolos sin unir en str
+        codigos = {k: v for k, v in codigos.items() if v}
+        datos = bytes(datos)
+        n_bits = min(n_bits, len(datos) * 8)
+        if not codigos or n_bits <= 0:
+            return b""
+        if n_bits < self.BITS_MIN_AUTOMATA or not self._automata_acotado(codigos):
+            return self._decodificar_por_bits(datos, n_bits, codigos)
+        textos, siguientes, (es_estado, valor), simbolos = self.tabla_decodificacion(codigos)
+        arr = np.frombuffer(datos, dtype=np.uint8)[:n_bits // 8]
+        texto = b""
+        estado = 0
+        if arr.size:
+            indices = self._estados_por_byte(arr, siguientes) * 256 + arr
+            texto = textos.reunir(indices).tobytes()
+            estado = int(siguientes[indices[-1]])
+        # Bits finales que no completan un byte
+        resto = []
+        lector = LectorBits(datos[arr.size:], n_bits % 8)
+        while lector.restantes():
+            bit = lector.leer(1)
+            if es_estado[estado, bit]:
+                estado = valor[estado, bit]
+            else:
+                resto.append(_simbolo_utf8(simbolos[valor[estado, bit]]))
+                estado = 0
+        return texto + b''.join(resto)
+    
+    def _automata_acotado(self, codigos):
+        # True si el autómata tendría a lo sumo MAX_ESTADOS_AUTOMATA estados (prefijos incompletos)
+        prefijos = {''}
+        for codigo in codigos.values():
+            prefijos.update(codigo[:i] for i in range(1, len(codigo)))
+            if len(prefijos) > self.MAX_ESTADOS_AUTOMATA:
+                return False
+        return True
+    
+    # Bits de la tabla primaria de _decodificar_por_bits() (2^k entradas)
+    BITS_TABLA_PRIMARIA = 12
+    
+    def _decodificar_por_bits(self, datos, n_bits, codigos):
+        """
+        Decodificación con memoria acotada: una consulta a la tabla primaria (los próximos k bits)
+        resuelve los códigos de hasta k bits; los más largos siguen bit a bit con un diccionario
+        por longitud. Da el mismo resultado que el autómata, también con bits inválidos.
+        """
+        por_longitud = {}
+        for simbolo, codigo in codigos.items():
+            por_longitud.setdefault(len(codigo), {})[int(codigo, 2)] = _simbolo_utf8(simbolo)
+        maxima = max(por_longitud)
+        k = min(self.BITS_TABLA_PRIMARIA, maxima)
+        cortos = sorted((l for l in por_longitud if l <= k), reverse=True)
+        if sum(len(por_longitud[l]) << (k - l) for l in cortos) > 1 << k:
+            k, cortos = 0, []  # Tabla que no cumple Kraft: sin tabla primaria
+        primaria = [None] * (1 << k)
+        for l in cortos:  # Los más cortos al final: ganan si uno es prefijo de otro
+            for valor, simbolo in por_longitud[l].items():
+                inicio = valor << (k - l)
+                primaria[inicio:inicio + (1 << (k - l))] = [(simbolo, l)] * (1 << (k - l))
+        
+        vista = memoryview(bytes(datos))
+        salida = []
+        acumulador = disponibles = siguiente = 0
+        restantes = n_bits
+        while restantes:
+            while disponibles < maxima and siguiente < len(vista):
+                trozo = vista[siguiente:siguiente + 8]
+                acumulador = (acumulador << (8 * len(trozo))) | int.from_bytes(trozo, 'big')
+                disponibles += 8 * len(trozo)
+                siguiente += len(trozo)
+            if restantes >= k:
+                entrada = primaria[(acumulador >> (disponibles - k)) & ((1 << k) - 1)]
+                if entrada is not None:
+                    salida.append(entrada[0])
+                    disponibles -= entrada[1]
+                    restantes -= entrada[1]
+                    acumulador &= (1 << disponibles) - 1
+                    continue
+                longitud = k
+            else:
+                longitud = 0  # Últimos bits: se prueban todas las longitudes
+            # Código más largo que la tabla (o final del flujo): bit a bit
+            valor = (acumulador >> (disponibles - longitud)) & ((1 << longitud) - 1)
+            simbolo = None
+            while simbolo is None:
+                if longitud >= maxima or longitud >= restantes:
+                    # Ningún código coincide: como el sumidero del autómata, no se emite nada más
+                    return b''.join(salida)
+                longitud += 1
+                valor = (valor << 1) | ((acumulador >> (disponibles - longitud)) & 1)
+                simbolo = por_longitud.get(longitud, {}).get(valor)
+            salida.append(simbolo)
+            disponibles -= longitud
+            restantes -= longitud
+            acumulador &= (1 << disponibles) - 1
+        return b''.join(salida)
     
     def serializar_tabla(self, codigos):
         return json.dumps(codigos)
     
     def deserializar_tabla(self, tabla_json):
         return json.loads(tabla_json)
+    
+    def codigos_canonicos(self, longitudes):
+        # {símbolo: longitud} -> {símbolo: código}; códigos consecutivos en orden (longitud, símbolo)
+        codigos = {}
+        codigo = 0
+        longitud_previa = 0
+        for simbolo, longitud in sorted(longitudes.items(), key=lambda x: (x[1], x[0])):
+            codigo <<= longitud - longitud_previa
+            codigos[simbolo] = format(codigo, f'0{longitud}b')
+            codigo += 1
+            longitud_previa = longitud
+        return codigos
+    
+    def empaquetar_contenedor(self, texto_binario, codigos, n_bits=None):
+        # codigos debe ser canónico (lo son los de codificar_*). texto_binario es la cadena de '0'/'1'
+        # de codificar_texto() o, con n_bits, los bytes ya empaquetados de codificar_bytes()
+        if n_bits is None:
+            n_bits = len(texto_binario)
+            bits = np.frombuffer(texto_binario.encode('ascii'), dtype=np.uint8) - ord('0')
+            datos = np.packbits(bits).tobytes()
+        else:
+            datos = bytes(texto_binario[:(n_bits + 7) // 8])
+        return self._empaquetar({ord(s): len(c) for s, c in codigos.items()}, datos, n_bits, 0)
+    
+    def empaquetar_contenedor_utf8(self, datos, n_bits, longitudes):
+        # Contenedor para la salida de codificar_utf8(): los símbolos son los valores de byte
+        presentes = {int(b): int(longitudes[b]) for b in np.flatnonzero(longitudes)}
+        return self._empaquetar(presentes, bytes(datos[:(n_bits + 7) // 8]), n_bits, self.FLAG_BYTES_UTF8)
+    
+    def _empaquetar(self, longitudes_por_simbolo, datos, n_bits, flags):
+        # longitudes_por_simbolo: {entero del símbolo (código Unicode o byte): longitud}
+        simbolos = sorted(longitudes_por_simbolo)
+        longitudes = [longitudes_por_simbolo[s] for s in simbolos]
+        if max(longitudes) <= 15:
+            flags |= self.FLAG_LONGITUDES_NIBBLE
+        tabla = bytearray(_escribir_varint(len(simbolos)))
+        previo = 0
+        for s in simbolos:
+            tabla += _escribir_varint(s - previo)
+            previo = s
+        if flags & self.FLAG_LONGITUDES_NIBBLE:
+            pares = longitudes + [0] * (len(longitudes) % 2)
+            tabla += bytes((a << 4) | b for a, b in zip(pares[0::2], pares[1::2]))
+        elif max(longitudes) > 255:
+            raise ValueError("Código Huffman demasiado largo para el contenedor")
+        else:
+            tabla += bytes(longitudes)
+        cabecera = (self.MAGIC + bytes([self.VERSION_CONTENEDOR, flags]) + bytes(tabla)
+                    + _escribir_varint(n_bits))
+        crc = zlib.crc32(cabecera + datos)
+        return cabecera + crc.to_bytes(4, 'big') + datos
+    
+    def leer_cabecera_contenedor(self, datos):
+        # Devuelve (inicio de datos, bits del mensaje, crc, {símbolo: longitud}); con
+        # FLAG_BYTES_UTF8 los símbolos son enteros 0-255. ValueError si no es un contenedor
+        # válido; IndexError si faltan bytes de cabecera.
+        if datos[:3] != self.MAGIC[:len(datos)]:
+            raise ValueError("No es un contenedor Huffman binario")
+        version, flags = datos[3], datos[4]
+        if version != self.VERSION_CONTENEDOR:
+            raise ValueError(f"Versión de contenedor no soportada: {version}")
+        n, pos = _leer_varint(datos, 5)
+        simbolos = []
+        previo = 0
+        for _ in range(n):
+            delta, pos = _leer_varint(datos, pos)
+            previo += delta
+            simbolos.append(previo)
+        if simbolos and simbolos[-1] > (0xFF if flags & self.FLAG_BYTES_UTF8 else 0x10FFFF):
+            raise ValueError("Símbolo fuera de rango")
+        if not flags & self.FLAG_BYTES_UTF8:
+            simbolos = [chr(c) for c in simbolos]
+        if flags & self.FLAG_LONGITUDES_NIBBLE:
+            crudo = datos[pos:pos + (n + 1) // 2]
+            pos += (n + 1) // 2
+            longitudes = [v for b in crudo for v in (b >> 4, b & 0x0F)][:n]
+        else:
+            crudo = datos[pos:pos + n]
+            pos += n
+            longitudes = list(crudo)
+        n_bits, pos = _leer_varint(datos, pos)
+        if len(longitudes) < n or len(datos) < pos + 4:
+            raise IndexError("Cabecera incompleta")
+        if n == 0 or 0 in longitudes or (n > 1 and sum(2.0 ** -l for l in longitudes) > 1):
+            raise ValueError("Tabla de longitudes inválida")
+        crc = int.from_bytes(datos[pos:pos + 4], 'big')
+        return pos + 4, n_bits, crc, dict(zip(simbolos, longitudes))
+    
+    def desempaquetar_contenedor(self, datos):
+        try:
+            inicio, n_bits, crc, longitudes = self.leer_cabecera_contenedor(datos)
+        except IndexError:
+            raise ValueError("Contenedor truncado")
+        cuerpo = datos[inicio:inicio + (n_bits + 7) // 8]
+        if len(cuerpo) * 8 < n_bits:
+            raise ValueError("Contenedor truncado")
+        if zlib.crc32(datos[:inicio - 4] + cuerpo) != crc:
+            raise ValueError("CRC32 no coincide")
+        codigos = self.codigos_canonicos(longitudes)
+        if not datos[4] & self.FLAG_BYTES_UTF8:
+            return self.decodificar_bytes(cuerpo, n_bits, codigos), codigos
+        try:
+            codigos_bytes = {bytes([b]): codigo for b, codigo in codigos.items()}
+            texto = self._decodificar(cuerpo, n_bits, codigos_bytes).decode('utf-8', 'surrogatepass')
+        except UnicodeDecodeError:
+            raise ValueError("El contenido no es UTF-8 válido")
+        return texto, codigos
+
+
+def incrustar_bytes_lsb(canal_2d, payload):
+    # Escribe el payload (bytes) en los LSB del canal, fila por fila, con una sola asignación.
+    # Modifica canal_2d en su lugar; solo se copian las filas que reciben bits.
+    bits = np.unpackbits(np.frombuffer(bytes(payload), dtype=np.uint8))
+    n = bits.size
+    if n == 0:
+        return
+    w = canal_2d.shape[1]
+    filas = -(-n // w)
+    plano = canal_2d[:filas].reshape(-1)
+    plano[:n] = (plano[:n] & 0xFE) | bits
+    canal_2d[:filas] = plano.reshape(filas, w)
+
+
+def incrustar_bytes_multiplano(imagen, payload, canales, bits_por_canal, pixel_inicio=0):
+    # Reparte el payload en los canales indicados y en los bits_por_canal planos más bajos.
+    # Orden: píxel (fila por fila) -> canal -> plano de bit (del 0 hacia arriba).
+    bits = np.unpackbits(np.frombuffer(bytes(payload), dtype=np.uint8))
+    k = bits_por_canal
+    if bits.size % k:
+        bits = np.concatenate((bits, np.zeros(k - bits.size % k, dtype=np.uint8)))
+    n_valores = bits.size // k
+    if n_valores == 0:
+        return
+    c = len(canales)
+    w = imagen.shape[1]
+    n_pixeles = -(-n_valores // c)
+    fila_ini = pixel_inicio // w
+    fila_fin = -(-(pixel_inicio + n_pixeles) // w)
+    region = imagen[fila_ini:fila_fin, :, canales]
+    valores = region.reshape(-1)
+    off = (pixel_inicio - fila_ini * w) * c
+    pesos = (1 << np.arange(k)).astype(np.uint8)
+    nuevos = (bits.reshape(-1, k) * pesos).sum(axis=1).astype(np.uint8)
+    mascara = np.uint8(0xFF ^ ((1 << k) - 1))
+    valores[off:off + n_valores] = (valores[off:off + n_valores] & mascara) | nuevos
+    imagen[fila_ini:fila_fin, :, canales] = valores.reshape(region.shape)
+
+
+def abrir_imagen_mapeada(image_path):
+    # Abre una imagen sin comprimir como vista np.memmap de forma (alto, ancho, canales) en orden RGB.
+    # Nada se lee del disco hasta que se accede a una región (lectura por teselas).
+    ext = os.path.splitext(image_path)[1].lower()
+    if ext == '.npy':
+        imagen = np.load(image_path, mmap_mode='r')
+    elif ext == '.bmp':
+        with open(image_path, 'rb') as f:
+            cabecera = f.read(54)
+        if len(cabecera) < 54 or cabecera[:2] != b'BM':
+            raise ValueError("BMP no válido")
+        offset = int.from_bytes(cabecera[10:14], 'little')
+        ancho = int.from_bytes(cabecera[18:22], 'little', signed=True)
+        alto = int.from_bytes(cabecera[22:26], 'little', signed=True)
+        bpp = int.from_bytes(cabecera[28:30], 'little')
+        compresion = int.from_bytes(cabecera[30:34], 'little')
+        if compresion != 0 or bpp not in (24, 32):
+            raise ValueError("Solo se admiten BMP sin compresión de 24 o 32 bits")
+        bytes_px = bpp // 8
+        paso = (ancho * bytes_px + 3) & ~3
+        filas = np.memmap(image_path, dtype=np.uint8, mode='r', offset=offset, shape=(abs(alto), paso))
+        imagen = filas[:, :ancho * bytes_px].reshape(abs(alto), ancho, bytes_px)[:, :, 2::-1]
+        if alto > 0:
+            imagen = imagen[::-1]
+    elif ext in ('.tif', '.tiff'):
+        try:
+            import tifffile
+        except ImportError:
+            raise ValueError("Para TIFF mapeado en memoria se necesita 'tifffile' (pip install tifffile)")
+        imagen = tifffile.memmap(image_path, mode='r')
+    else:
+        raise ValueError("Formato no soportado para análisis por teselas (usa BMP, TIFF o .npy)")
+    if imagen.ndim == 2:
+        imagen = imagen[:, :, None]
+    if imagen.dtype != np.uint8:
+        raise ValueError("Solo se admiten imágenes de 8 bits por canal")
+    return imagen
+
+
+def _sumas_pares(x, y):
+    # Sumas (n, Σx, Σy, Σx², Σy², Σxy) para correlación de Pearson acumulable por teselas.
+    # x e y pueden ser vistas con strides (p. ej. canal[:, :-1]); einsum acumula en int64
+    # con buffers internos pequeños, sin crear copias completas de los datos
+    x, y = np.atleast_2d(x, y)
+    return np.array([x.size,
+                     int(x.sum(dtype=np.int64)),
+                     int(y.sum(dtype=np.int64)),
+                     int(np.einsum('ij,ij->', x, x, dtype=np.int64)),
+                     int(np.einsum('ij,ij->', y, y, dtype=np.int64)),
+                     int(np.einsum('ij,ij->', x, y, dtype=np.int64))], dtype=object)
+
+
+def _pearson_desde_sumas(sumas):
+    n, sx, sy, sxx, syy, sxy = (int(v) for v in sumas)
+    den = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    if n == 0 or den <= 0:
+        # Canal constante: igual que np.corrcoef, la correlación no está definida
+        return float('nan')
+    return (n * sxy - sx * sy) / np.sqrt(float(den))
+
+
+def histograma_uint8(datos, bloque=1 << 20):
+    # np.bincount convierte su entrada a intp (8 bytes por valor); por bloques ese
+    # temporal queda acotado a `bloque` valores en vez de 8x el tamaño del canal
+    plano = np.asarray(datos, dtype=np.uint8).ravel()
+    histograma = np.zeros(256, dtype=np.int64)
+    for i in range(0, plano.size, bloque):
+        histograma += np.bincount(plano[i:i + bloque], minlength=256)
+    return histograma
+
+
+def medir_memoria(funcion, *args, **kwargs):
+    # Ejecuta funcion(*args) y devuelve (resultado, pico de memoria en bytes) según tracemalloc,
+    # que también registra los buffers de NumPy
+    tracemalloc.start()
+    try:
+        resultado = funcion(*args, **kwargs)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, pico
+
+
+class ContextoAnalisis:
+    # Decodifica la imagen una sola vez y comparte, por canal, el arreglo plano,
+    # el plano de bits LSB y su versión empaquetada entre extractores y pruebas estadísticas
+
+    def __init__(self, imagen):
+        self.imagen = imagen
+        self._planos = {}
+        self._bits = {}
+        self._empaquetados = {}
+        self._histogramas = {}
+
+    @classmethod
+    def desde_archivo(cls, image_path):
+        imagen = cv2.imread(image_path)
+        if imagen is None:
+            raise ValueError("No se pudo cargar la imagen")
+        return cls(cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB))
+
+    def canal(self, c):
+        return self.imagen[:, :, c]
+
+    def canal_plano(self, c):
+        if c not in self._planos:
+            # El canal de una imagen RGB intercalada no es contiguo: ravel lo copia, pero una
+            # sola vez por canal, y la copia se comparte entre pruebas
+            self._planos[c] = self.canal(c).ravel()
+        return self._planos[c]
+
+    def bits_lsb(self, c):
+        if c not in self._bits:
+            self._bits[c] = np.bitwise_and(self.canal_plano(c), 1)
+        return self._bits[c]
+
+    def histograma(self, c):
+        if c not in self._histogramas:
+            self._histogramas[c] = histograma_uint8(self.canal_plano(c))
+        return self._histogramas[c]
+
+    def lsb_empaquetados(self, c):
+        if c not in self._empaquetados:
+            bits = self.bits_lsb(c)
+            self._empaquetados[c] = np.packbits(bits[:bits.size - bits.size % 8])
+        return self._empaquetados[c]
+
+
+class CacheResultados:
+    # Caché en disco de resultados de análisis (un JSON por imagen). La clave es BLAKE2 de los
+    # bytes del archivo más la versión del detector y el tipo de registro (cada herramienta guarda
+    # diccionarios distintos), así un acierto no decodifica la imagen y un cambio de versión
+    # invalida todo. Se poda por tamaño total quitando los menos usados (LRU según la fecha de
+    # modificación, que se actualiza en cada acierto). El tamaño total se cuenta en disco y luego
+    # se actualiza en cada guardado: conviene reutilizar la misma instancia.
+
+    # Otros procesos escriben en la misma carpeta sin que este contador lo vea: tras escribir
+    # limite_bytes / RECUENTO_CADA bytes se vuelve a contar en disco, así con p procesos el
+    # exceso queda por debajo de p / RECUENTO_CADA del límite
+    RECUENTO_CADA = 64
+
+    def __init__(self, directorio, limite_bytes=256 * 2**20, version=None):
+        self.directorio = directorio
+        self.limite_bytes = limite_bytes
+        self.version = version or LSBDetector.VERSION
+        self._total = None
+        self._sin_contar = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, image_path, tipo='completo', bloque=1 << 20):
+        # tipo: 'completo' (analizar_imagen_completo) o 'fila' (escaneo_lotes)
+        h = hashlib.blake2b(digest_size=20)
+        h.update(self.version.encode('ascii') + b'\0' + tipo.encode('ascii') + b'\0')
+        with open(image_path, 'rb') as f:
+            for parte in iter(lambda: f.read(bloque), b''):
+                h.update(parte)
+        return h.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], clave + '.json')
+
+    def obtener(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            os.utime(ruta)
+        except (OSError, ValueError):
+            return None
+        return datos
+
+    def guardar(self, clave, datos):
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        tam = os.path.getsize(ruta)
+        self._sin_contar += tam
+        if self._total is None or self._sin_contar * self.RECUENTO_CADA >= self.limite_bytes:
+            self._total = self.tamano()
+            self._sin_contar = 0
+        else:
+            self._total += tam
+        if self._total > self.limite_bytes:
+            self.podar()
+
+    def _entradas(self):
+        for sub in os.scandir(self.directorio):
+            if sub.is_dir():
+                for entrada in os.scandir(sub.path):
+                    if entrada.name.endswith('.json'):
+                        yield entrada
+
+    def tamano(self):
+        return sum(e.stat().st_size for e in self._entradas())
+
+    def podar(self, fraccion=0.9):
+        # Borra las entradas menos usadas hasta quedar por debajo de fraccion * limite
+        entradas = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._entradas()))
+        total = sum(tam for _, tam, _ in entradas)
+        objetivo = self.limite_bytes * fraccion
+        for _, tam, ruta in entradas:
+            if total <= objetivo:
+                break
+            try:
+                os.remove(ruta)
+                total -= tam
+            except OSError:
+                pass
+        self._total = total
+        self._sin_contar = 0
+        return total
+
+
+class AcumuladorRachas:
+    # Test de rachas incremental: recibe la secuencia binaria por bloques (en orden de lectura)
+    # y guarda solo contadores, así que no necesita el canal completo en memoria
+
+    def __init__(self):
+        self.n = 0
+        self.unos = 0
+        self.cambios = 0
+        self.primero = None
+        self.ultimo = None
+
+    def agregar(self, bloque):
+        bits = np.asarray(bloque).reshape(-1)
+        if bits.size == 0:
+            return self
+        if self.ultimo is not None and bits[0] != self.ultimo:
+            self.cambios += 1
+        self.cambios += int(np.count_nonzero(bits[1:] != bits[:-1]))
+        self.unos += int(np.count_nonzero(bits))
+        self.n += bits.size
+        if self.primero is None:
+            self.primero = bits[0]
+        self.ultimo = bits[-1]
+        return self
+
+    def combinar(self, otro):
+        # Une el acumulador de un bloque posterior (p. ej. calculado en otro proceso)
+        if otro.n == 0:
+            return self
+        if self.n and self.ultimo != otro.primero:
+            self.cambios += 1
+        self.cambios += otro.cambios
+        self.unos += otro.unos
+        self.n += otro.n
+        if self.primero is None:
+            self.primero = otro.primero
+        self.ultimo = otro.ultimo
+        return self
+
+    def resultado(self):
+        n = self.n
+        if n == 0:
+            return 0, 1
+        runs = self.cambios + 1
+        ones = self.unos
+        zeros = n - ones
+        if ones == 0 or zeros == 0:
+            return runs, 1
+        expected_runs = (2 * ones * zeros) / n + 1
+        variance_runs = (2 * ones * zeros * (2 * ones * zeros - n)) / (n**2 * (n - 1))
+        if variance_runs <= 0:
+            return runs, 1
+        z_score = (runs - expected_runs) / np.sqrt(variance_runs)
+        p_value = 2 * (1 - stats.norm.cdf(abs(z_score)))
+        return z_score, p_value
+
+
+class AcumuladorCorrelacion:
+    # Correlación de Pearson entre vecinos, incremental: recibe el canal por bandas de filas
+    # (en orden) y guarda sumas (n, Σx, Σy, Σx², Σy², Σxy) por dirección. Solo conserva la
+    # primera y la última fila para unir bandas. Con tam_bloque acumula además, por bloque
+    # de tam_bloque x tam_bloque píxeles, los pares horizontales y verticales de ese bloque
+    # (cada par se asigna al bloque de su primer píxel).
+
+    DIRECCIONES = ('horizontal', 'vertical', 'diagonal', 'antidiagonal')
+
+    def __init__(self, tam_bloque=None, fila_inicial=0, direcciones=DIRECCIONES):
+        self.tam_bloque = tam_bloque
+        self.fila_inicial = fila_inicial
+        self.direcciones = tuple(direcciones)
+        self.sumas = {d: np.zeros(6, dtype=object) for d in self.direcciones}
+        self.filas = 0
+        self.primera_fila = None
+        self.ultima_fila = None
+        self._bloques = {}
+
+    def _pares_entre(self, a, b, fila_a):
+        # Pares entre filas consecutivas: a[i] con b[i] (b es la fila siguiente a a)
+        if 'vertical' in self.direcciones:
+            self.sumas['vertical'] += _sumas_pares(a, b)
+            self._acumular_bloques(a, b, fila_a)
+        if a.shape[-1] > 1:
+            if 'diagonal' in self.direcciones:
+                self.sumas['diagonal'] += _sumas_pares(a[..., :-1], b[..., 1:])
+            if 'antidiagonal' in self.direcciones:
+                self.sumas['antidiagonal'] += _sumas_pares(a[..., 1:], b[..., :-1])
+
+    def _acumular_bloques(self, x, y, fila0):
+        if self.tam_bloque is None or x.size == 0:
+            return
+        x, y = np.atleast_2d(x, y)
+        t = self.tam_bloque
+        filas, columnas = x.shape
+        n_bx = -(-self.ancho // t)
+        cols = np.arange(0, columnas, t)
+        ids = (fila0 + np.arange(filas)) // t
+        cortes = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        x = x.astype(np.int64)
+        y = y.astype(np.int64)
+        n_col = np.diff(np.r_[cols, columnas])
+        n_fil = np.diff(np.r_[cortes, filas])
+        for k, valores in enumerate((x, y, x * x, y * y, x * y), start=1):
+            por_bloque = np.add.reduceat(np.add.reduceat(valores, cols, axis=1), cortes, axis=0)
+            for fila_bloque, suma in zip(ids[cortes], por_bloque):
+                self._bloque(fila_bloque, n_bx)[:suma.size, k] += suma
+        for fila_bloque, nf in zip(ids[cortes], n_fil):
+            self._bloque(fila_bloque, n_bx)[:n_col.size, 0] += nf * n_col
+
+    def _bloque(self, fila_bloque, n_bx):
+        if fila_bloque not in self._bloques:
+            self._bloques[fila_bloque] = np.zeros((n_bx, 6), dtype=np.int64)
+        return self._bloques[fila_bloque]
+
+    def agregar(self, banda):
+        banda = np.atleast_2d(banda)
+        if banda.size == 0:
+            return self
+        self.ancho = banda.shape[1]
+        fila0 = self.fila_inicial + self.filas
+        if 'horizontal' in self.direcciones and self.ancho > 1:
+            self.sumas['horizontal'] += _sumas_pares(banda[:, :-1], banda[:, 1:])
+            self._acumular_bloques(banda[:, :-1], banda[:, 1:], fila0)
+        if self.ultima_fila is not None:
+            self._pares_entre(self.ultima_fila, banda[0], fila0 - 1)
+        if banda.shape[0] > 1:
+            self._pares_entre(banda[:-1], banda[1:], fila0)
+        if self.primera_fila is None:
+            self.primera_fila = banda[0].copy()
+        self.ultima_fila = banda[-1].copy()
+        self.filas += banda.shape[0]
+        return self
+
+    def combinar(self, otro):
+        # Une el acumulador de las filas siguientes (creado con fila_inicial = filas de este)
+        if otro.filas == 0:
+            return self
+        if self.ultima_fila is not None:
+            self._pares_entre(self.ultima_fila, otro.primera_fila, self.fila_inicial + self.filas - 1)
+        for d in self.direcciones:
+            self.sumas[d] += otro.sumas[d]
+        for fila_bloque, sumas in otro._bloques.items():
+            self._bloque(fila_bloque, sumas.shape[0])[:] += sumas
+        self.ancho = otro.ancho
+        if self.primera_fila is None:
+            self.primera_fila = otro.primera_fila
+        self.ultima_fila = otro.ultima_fila
+        self.filas += otro.filas
+        return self
+
+    def resultado(self):
+        return {d: _pearson_desde_sumas(self.sumas[d]) for d in self.direcciones}
+
+    def correlacion_por_bloques(self):
+        # Matriz (bloques_alto, bloques_ancho) con la correlación de cada bloque; NaN si no está definida
+        if not self._bloques:
+            return np.zeros((0, 0))
+        n_by = max(self._bloques) + 1
+        n_bx = next(iter(self._bloques.values())).shape[0]
+        sumas = np.zeros((n_by, n_bx, 6), dtype=np.int64)
+        for fila_bloque, valores in self._bloques.items():
+            sumas[fila_bloque] = valores
+        n, sx, sy, sxx, syy, sxy = (sumas[..., k].astype(np.float64) for k in range(6))
+        den = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(den > 0, (n * sxy - sx * sy) / np.sqrt(den), np.nan)
 
 
 class LSBDetector:
+
+    # Modo multiplano: marca de 3 bytes (b"M", bits por canal, máscara RGB en dígitos ASCII)
+    # en los primeros píxeles del canal base; el payload empieza después en todos los canales
+    MARCA_MULTIPLANO = b"M"
+    PIXELES_MARCA = 24
+    # Cambiarla cuando cambien los resultados del análisis: invalida CacheResultados
+    VERSION = "1.7"
+    # Prefiltro: bytes LSB que se decodifican al inicio de cada canal y marcas reconocidas
+    BYTES_PREFILTRO = 48
+    MARCAS_AVANCE2 = (b"PLAIN:", b"HUFFMAN:", b"ZLIB:")
+    MIN_TEXTO_PREFILTRO = 4
   
-    def __init__(self):
+    def __init__(self, cache=None):
         self.image = None
         self.results = {}
         self.huffman = CodificadorHuffman()
+        self.cache = cache
 
     def load_image(self, image_path):
         try:
@@ -122,6 +1103,13 @@ class LSBDetector:
             print(f"Error cargando imagen: {e}")
             return False
 
+    def _cargar(self, image_path, contexto=None):
+        # Con un ContextoAnalisis se reutiliza la imagen ya decodificada
+        if contexto is not None:
+            self.image = contexto.imagen
+            return True
+        return self.load_image(image_path)
+
     def _lsb_bits_brute(self, channel_2d):
         
         h, w = channel_2d.shape
@@ -150,34 +1138,223 @@ class LSBDetector:
      
         return top_half + bottom_half
 
+    def _lsb_bits_vectorizado(self, channel_2d):
+        # Plano LSB empaquetado: 8 píxeles por byte (uint8), sin objetos str por píxel
+        bits = np.bitwise_and(channel_2d, 1).reshape(-1)
+        bits = bits[:bits.size - bits.size % 8]
+        return np.packbits(bits)
+
+    def _extraer_bits(self, channel_2d, metodo, contexto=None, c=0):
+        # Con un ContextoAnalisis se usa el plano LSB empaquetado del canal c, calculado una sola
+        # vez, sea cual sea el método: los algoritmos solo se ejecutan (y se comparan) sin contexto
+        if contexto is not None:
+            return contexto.lsb_empaquetados(c), "Plano LSB compartido"
+        if metodo == 'vectorizado':
+            return self._lsb_bits_vectorizado(channel_2d), "Vectorizado (NumPy)"
+        if metodo == 'divide_y_venceras':
+            return self._lsb_bits_divide_and_conquer(channel_2d), "Divide y Vencerás"
+        return self._lsb_bits_brute(channel_2d), "Fuerza Bruta"
+
+    def _empaquetar_bits(self, lsb_bits):
+        # Acepta la lista de '0'/'1' de FB/DyV o bytes ya empaquetados
+        if isinstance(lsb_bits, np.ndarray) and lsb_bits.dtype == np.uint8:
+            return lsb_bits
+        if isinstance(lsb_bits, (bytes, bytearray, memoryview)):
+            return np.frombuffer(lsb_bits, dtype=np.uint8)
+        bits = np.frombuffer(''.join(lsb_bits).encode('ascii'), dtype=np.uint8) - ord('0')
+        bits = bits[:bits.size - bits.size % 8]
+        return np.packbits(bits)
+
     def _bits_to_text(self, lsb_bits):
         
-        mensaje = ""
-        for i in range(0, len(lsb_bits), 8):
-            byte = lsb_bits[i:i+8]
-            if len(byte) < 8:
-                continue
-            code = int(''.join(byte), 2)
-            if 32 <= code <= 126:
-                mensaje += chr(code)
-            else:
-                break
-            if mensaje.endswith("END"):
-                return mensaje[:-3]
+        datos = self._empaquetar_bits(lsb_bits)
+        no_imprimibles = np.flatnonzero((datos < 32) | (datos > 126))
+        fin = no_imprimibles[0] if no_imprimibles.size else datos.size
+        mensaje = datos[:fin].tobytes().decode('ascii')
+        pos_end = mensaje.find("END")
+        if pos_end != -1:
+            return mensaje[:pos_end]
         return mensaje if mensaje else None
 
-    def extraer_mensaje_lsb(self, image_path, metodo='fuerza_bruta'):
+    def _iterar_bytes_lsb(self, channel_2d, pixeles_por_bloque=65536):
+        # Generador: recorre el canal por bloques de filas y entrega los LSB ya empaquetados.
+        # Los bits sobrantes (menos de 8) se arrastran al siguiente bloque.
+        h, w = channel_2d.shape
+        filas = max(1, pixeles_por_bloque // max(w, 1))
+        resto = np.empty(0, dtype=np.uint8)
+        for inicio in range(0, h, filas):
+            bits = np.bitwise_and(channel_2d[inicio:inicio + filas], 1).reshape(-1)
+            if resto.size:
+                bits = np.concatenate((resto, bits))
+            corte = bits.size - bits.size % 8
+            resto = bits[corte:]
+            if corte:
+                yield np.packbits(bits[:corte]).tobytes()
+
+    def _leer_hasta_terminador(self, channel_2d, terminador=b"END", solo_imprimibles=False):
+        # Devuelve (datos, encontrado); deja de leer el canal en cuanto aparece el terminador
+        # (o, en modo texto plano, el primer byte no imprimible)
+        buffer = bytearray()
+        for bloque in self._iterar_bytes_lsb(channel_2d):
+            corte_no_imprimible = False
+            if solo_imprimibles:
+                arr = np.frombuffer(bloque, dtype=np.uint8)
+                no_imprimibles = np.flatnonzero((arr < 32) | (arr > 126))
+                if no_imprimibles.size:
+                    bloque = bloque[:no_imprimibles[0]]
+                    corte_no_imprimible = True
+            desde = max(0, len(buffer) - len(terminador) + 1)
+            buffer.extend(bloque)
+            pos = buffer.find(terminador, desde)
+            if pos != -1:
+                return bytes(buffer[:pos]), True
+            if corte_no_imprimible:
+                break
+        return bytes(buffer), False
+
+    def _leer_bytes_lsb(self, channel_2d, inicio_byte, n_bytes):
+        # Lee n_bytes empaquetados a partir de inicio_byte tocando solo las filas necesarias
+        h, w = channel_2d.shape
+        p0 = inicio_byte * 8
+        p1 = min(p0 + n_bytes * 8, h * w)
+        if p1 <= p0:
+            return b""
+        fila_ini = p0 // w
+        fila_fin = -(-p1 // w)
+        bloque = channel_2d[fila_ini:fila_fin].reshape(-1)
+        desplazamiento = p0 - fila_ini * w
+        bits = np.bitwise_and(bloque[desplazamiento:desplazamiento + (p1 - p0)], 1)
+        bits = bits[:bits.size - bits.size % 8]
+        return np.packbits(bits).tobytes()
+
+    def _leer_bytes_multiplano(self, canales, bits_por_canal, inicio_byte, n_bytes, pixel_inicio=0):
+        # Inverso de incrustar_bytes_multiplano, leyendo solo las filas que cubren el rango pedido
+        k = bits_por_canal
+        c = len(canales)
+        h, w, _ = self.image.shape
+        total_valores = (h * w - pixel_inicio) * c
+        b0 = inicio_byte * 8
+        b1 = min(b0 + n_bytes * 8, total_valores * k)
+        if b1 <= b0:
+            return b""
+        v0, v1 = b0 // k, -(-b1 // k)
+        px0 = pixel_inicio + v0 // c
+        px1 = pixel_inicio + -(-v1 // c)
+        fila_ini, fila_fin = px0 // w, -(-px1 // w)
+        valores = self.image[fila_ini:fila_fin, :, canales].reshape(-1)
+        off = (pixel_inicio - fila_ini * w) * c + v0
+        valores = valores[off:off + (v1 - v0)]
+        bits = ((valores[:, None] >> np.arange(k, dtype=np.uint8)) & 1).astype(np.uint8).reshape(-1)
+        bits = bits[b0 - v0 * k:b1 - v0 * k]
+        bits = bits[:bits.size - bits.size % 8]
+        return np.packbits(bits).tobytes()
+
+    def _detectar_multiplano(self, channel_2d):
+        marca = self._leer_bytes_lsb(channel_2d, 0, self.PIXELES_MARCA // 8)
+        if len(marca) < 3 or marca[:1] != self.MARCA_MULTIPLANO:
+            return None
+        if not (chr(marca[1]) in "12345678" and chr(marca[2]) in "1234567"):
+            return None
+        k = int(chr(marca[1]))
+        mascara = int(chr(marca[2]))
+        canales = [c for c in range(3) if mascara & (1 << c)]
+        return canales, k
+
+    def _leer_payload_huffman(self, channel_2d, leer=None, capacidad=None):
+        # Usa la cabecera len_tabla:08d / len_mensaje:08d para leer exactamente los píxeles del payload
+        if leer is None:
+            leer = lambda inicio, n: self._leer_bytes_lsb(channel_2d, inicio, n)
+            capacidad = channel_2d.size // 8
+        cabecera = leer(0, 8)
         try:
-            if not self.load_image(image_path):
+            len_tabla = int(cabecera)
+        except ValueError:
+            return b""
+        if len_tabla < 0 or 16 + len_tabla > capacidad:
+            return b""
+        tabla_y_longitud = leer(8, len_tabla + 8)
+        try:
+            len_msg = int(tabla_y_longitud[-8:])
+        except ValueError:
+            return b""
+        n_datos = (len_msg + 7) // 8
+        if len_msg < 0 or 16 + len_tabla + n_datos > capacidad:
+            return b""
+        datos = leer(16 + len_tabla, n_datos)
+        return cabecera + tabla_y_longitud + datos
+
+    def _leer_contenedor(self, leer, capacidad):
+        # Contenedor binario: se lee un prefijo creciente hasta completar la cabecera y luego
+        # exactamente los bytes de datos que indica
+        n = 64
+        while True:
+            datos = leer(0, min(n, capacidad))
+            try:
+                inicio, n_bits, _, _ = self.huffman.leer_cabecera_contenedor(datos)
+                break
+            except IndexError:
+                if n >= capacidad:
+                    return b""
+                n *= 4
+            except ValueError:
+                return b""
+        total = inicio + (n_bits + 7) // 8
+        if total > capacidad:
+            return b""
+        return datos[:total] if total <= len(datos) else leer(0, total)
+
+    def _leer_payload_multiplano(self, canales, bits_por_canal):
+        h, w, _ = self.image.shape
+        capacidad = (h * w - self.PIXELES_MARCA) * len(canales) * bits_por_canal // 8
+        leer = lambda inicio, n: self._leer_bytes_multiplano(canales, bits_por_canal, inicio, n,
+                                                             self.PIXELES_MARCA)
+        if leer(0, 3) == CodificadorHuffman.MAGIC:
+            return self._leer_contenedor(leer, capacidad)
+        return self._leer_payload_huffman(None, leer, capacidad)
+
+    def prefiltro_lsb(self, imagen=None):
+        # Decodifica solo los primeros BYTES_PREFILTRO bytes LSB de cada canal (unas pocas filas)
+        # y busca huellas de los formatos conocidos. Devuelve [(canal, formato), ...]
+        imagen = self.image if imagen is None else imagen
+        hallazgos = []
+        for c in range(imagen.shape[2]):
+            canal = imagen[:, :, c]
+            datos = self._leer_bytes_lsb(canal, 0, self.BYTES_PREFILTRO)
+            marca = next((m for m in self.MARCAS_AVANCE2 if datos.startswith(m)), None)
+            if marca is not None:
+                hallazgos.append((c, marca[:-1].decode('ascii')))
+            elif self._detectar_multiplano(canal) is not None:
+                hallazgos.append((c, 'multiplano'))
+            elif datos.startswith(CodificadorHuffman.MAGIC) or \
+                    (datos[:8].isdigit() and 16 + int(datos[:8]) <= canal.size // 8):
+                hallazgos.append((c, 'huffman'))
+            elif c == 0:
+                # Texto estándar (solo canal rojo): racha imprimible larga o terminador END
+                arr = np.frombuffer(datos, dtype=np.uint8)
+                no_imprimibles = np.flatnonzero((arr < 32) | (arr > 126))
+                racha = datos[:no_imprimibles[0]] if no_imprimibles.size else datos
+                if len(racha) >= self.MIN_TEXTO_PREFILTRO or b"END" in racha:
+                    hallazgos.append((c, 'texto'))
+        return hallazgos
+
+    def _texto_streaming(self, channel_2d):
+        # Igual que _bits_to_text: "" si el terminador está al inicio, None si no hay texto
+        datos, encontrado = self._leer_hasta_terminador(channel_2d, solo_imprimibles=True)
+        mensaje = datos.decode('ascii')
+        return mensaje if mensaje or encontrado else None
+
+    def extraer_mensaje_lsb(self, image_path, metodo='fuerza_bruta', contexto=None):
+        try:
+            if not self._cargar(image_path, contexto):
                 return None
             canal_rojo = self.image[:, :, 0]
+            if metodo == 'streaming':
+                start = time.time()
+                mensaje = self._texto_streaming(canal_rojo)
+                print(f"Tiempo Streaming: {time.time() - start:.5f} s")
+                return mensaje
             start = time.time()
-            if metodo == 'divide_y_venceras':
-                lsb_bits = self._lsb_bits_divide_and_conquer(canal_rojo)
-                metodo_nombre = "Divide y Vencerás"
-            else:
-                lsb_bits = self._lsb_bits_brute(canal_rojo)
-                metodo_nombre = "Fuerza Bruta"
+            lsb_bits, metodo_nombre = self._extraer_bits(canal_rojo, metodo, contexto)
             end = time.time()
             print(f"Tiempo {metodo_nombre}: {end - start:.5f} s")
             return self._bits_to_text(lsb_bits)
@@ -185,7 +1362,8 @@ class LSBDetector:
             print(f"Error extrayendo mensaje: {e}")
             return None
 
-    def ocultar_mensaje_huffman(self, image_path, mensaje, output_path, channel=0):
+    def ocultar_mensaje_huffman(self, image_path, mensaje, output_path, channel=0,
+                                canales=None, bits_por_canal=1, formato='binario'):
        
         try:
             if not self.load_image(image_path):
@@ -194,48 +1372,65 @@ class LSBDetector:
             print(f"Mensaje original: '{mensaje}'")
             print(f"Longitud: {len(mensaje)} caracteres")
             
-            texto_binario, tabla, stats = self.huffman.codificar_texto(mensaje)
+            binario = formato == 'binario'
+            if formato == 'utf8':
+                # Huffman sobre los bytes UTF-8 (alfabeto fijo de 256 símbolos)
+                mensaje_bytes, n_bits, longitudes, stats = self.huffman.codificar_utf8(mensaje)
+            else:
+                mensaje_bytes, n_bits, tabla, stats = self.huffman.codificar_bytes(mensaje)
             print(f"\nCompresión Huffman:")
             print(f"  - Cantidad de bits originales: {stats['longitud_original_bits']}")
             print(f"  - Bits comprimidos: {stats['longitud_comprimida_bits']}")
             print(f"  - Ahorro: {stats['ahorro_porcentual']:.1f}%")
             
-            tabla_json = self.huffman.serializar_tabla(tabla)
-            len_tabla = len(tabla_json)
-            len_mensaje = len(texto_binario)
-            cabecera = f"{len_tabla:08d}{tabla_json}{len_mensaje:08d}"
-            
-            mensaje_chars = ""
-            for i in range(0, len(texto_binario), 8):
-                byte = texto_binario[i:i+8]
-                if len(byte) < 8:
-                    byte = byte.ljust(8, '0')
-                mensaje_chars += chr(int(byte, 2))
-            
-            payload_completo = cabecera + mensaje_chars + "END"
-            bits_totales = ''.join(format(ord(c), '08b') for c in payload_completo)
-            print(f"\nBits totales: {len(bits_totales)} bits ")
+            if formato == 'utf8':
+                payload_completo = self.huffman.empaquetar_contenedor_utf8(mensaje_bytes, n_bits, longitudes)
+                print(f"Contenedor binario (bytes UTF-8): cabecera de {len(payload_completo) - len(mensaje_bytes)} bytes")
+            elif binario:
+                payload_completo = self.huffman.empaquetar_contenedor(mensaje_bytes, tabla, n_bits)
+                print(f"Contenedor binario: cabecera de {len(payload_completo) - len(mensaje_bytes)} bytes")
+            else:
+                # Formato legado: tabla JSON y longitudes decimales de 8 dígitos, terminado en END
+                tabla_json = self.huffman.serializar_tabla(tabla)
+                len_tabla = len(tabla_json)
+                cabecera = f"{len_tabla:08d}{tabla_json}{n_bits:08d}"
+                payload_completo = cabecera.encode('ascii') + mensaje_bytes + b"END"
+            bits_totales = len(payload_completo) * 8
+            print(f"\nBits totales: {bits_totales} bits ")
             
+            nombres = ['Rojo', 'Verde', 'Azul']
             canal = self.image[:, :, channel]
-            capacidad = canal.size
-            if len(bits_totales) > capacidad:
-                print(f"Error: Mensaje muy grande ({len(bits_totales)} bits > {capacidad} píxeles)")
+            multiplano = canales is not None or bits_por_canal != 1
+            if multiplano:
+                canales = sorted(set(canales if canales is not None else [channel]))
+                if not canales or not all(c in (0, 1, 2) for c in canales) or not 1 <= bits_por_canal <= 8:
+                    print("Error: configuración de canales/bits no válida")
+                    return False
+                capacidad = (canal.size - self.PIXELES_MARCA) * len(canales) * bits_por_canal
+            else:
+                capacidad = canal.size
+            if bits_totales > capacidad:
+                print(f"Error: Mensaje muy grande ({bits_totales} bits > {capacidad} bits disponibles)")
                 return False
             
-            img_stego = self.image.copy()
-            bit_idx = 0
-            for i in range(canal.shape[0]):
-                for j in range(canal.shape[1]):
-                    if bit_idx < len(bits_totales):
-                        img_stego[i, j, channel] = (img_stego[i, j, channel] & 0xFE) | int(bits_totales[bit_idx])
-                        bit_idx += 1
-                    else:
-                        break
+            # La conversión a BGR ya produce un arreglo nuevo: se incrusta directamente en él
+            # (canal RGB c -> índice BGR 2 - c) en vez de copiar antes toda la imagen RGB
+            img_bgr = cv2.cvtColor(self.image, cv2.COLOR_RGB2BGR)
+            if multiplano:
+                mascara = sum(1 << c for c in canales)
+                marca = self.MARCA_MULTIPLANO + f"{bits_por_canal}{mascara}".encode('ascii')
+                incrustar_bytes_lsb(img_bgr[:, :, 2 - channel], marca)
+                incrustar_bytes_multiplano(img_bgr, payload_completo, [2 - c for c in canales],
+                                           bits_por_canal, self.PIXELES_MARCA)
+            else:
+                incrustar_bytes_lsb(img_bgr[:, :, 2 - channel], payload_completo)
             
-            img_bgr = cv2.cvtColor(img_stego, cv2.COLOR_RGB2BGR)
             cv2.imwrite(output_path, img_bgr)
             print(f"Imagen guardada: {output_path}")
-            print(f"Canal usado: {['Rojo', 'Verde', 'Azul'][channel]}")
+            if multiplano:
+                print(f"Canales usados: {', '.join(nombres[c] for c in canales)} ({bits_por_canal} bit(s) por canal)")
+            else:
+                print(f"Canal usado: {nombres[channel]}")
             return True
         except Exception as e:
             print(f"Error ocultando mensaje: {e}")
@@ -243,30 +1438,47 @@ class LSBDetector:
             traceback.print_exc()
             return False
 
-    def extraer_mensaje_huffman(self, image_path, metodo='fuerza_bruta', channel=0):
+    def extraer_mensaje_huffman(self, image_path, metodo='fuerza_bruta', channel=0, contexto=None):
         try:
-            if not self.load_image(image_path):
+            if not self._cargar(image_path, contexto):
                 return None, None
             canal = self.image[:, :, channel]
-            print(f"Extrayendo bits (canal {channel}) con {metodo}...")
+            compartido = contexto is not None and metodo not in ('vectorizado', 'streaming')
+            origen = "del plano LSB compartido" if compartido else f"con {metodo}"
+            print(f"Extrayendo bits (canal {channel}) {origen}...")
             
             inicio = time.time()
-            if metodo == 'divide_y_venceras':
-                bits_lsb = self._lsb_bits_divide_and_conquer(canal)
+            distribucion = self._detectar_multiplano(canal)
+            if distribucion is not None:
+                canales, bits_por_canal = distribucion
+                print(f"Modo multiplano: canales {canales}, {bits_por_canal} bit(s) por canal")
+                mensaje_raw = self._leer_payload_multiplano(canales, bits_por_canal)
+            elif metodo in ('vectorizado', 'streaming') and \
+                    self._leer_bytes_lsb(canal, 0, 3) == CodificadorHuffman.MAGIC:
+                leer = lambda inicio, n: self._leer_bytes_lsb(canal, inicio, n)
+                mensaje_raw = self._leer_contenedor(leer, canal.size // 8)
+            elif metodo == 'vectorizado':
+                mensaje_raw = self._leer_payload_huffman(canal)
+            elif metodo == 'streaming':
+                mensaje_raw, _ = self._leer_hasta_terminador(canal)
             else:
-                bits_lsb = self._lsb_bits_brute(canal)
+                bits_lsb, _ = self._extraer_bits(canal, metodo, contexto, channel)
+                mensaje_raw = self._empaquetar_bits(bits_lsb).tobytes()
+                pos_end = -1 if mensaje_raw.startswith(CodificadorHuffman.MAGIC) else mensaje_raw.find(b"END")
+                if pos_end != -1:
+                    mensaje_raw = mensaje_raw[:pos_end]
             tiempo = time.time() - inicio
             print(f"Tiempo: {tiempo:.5f} s")
             
-            mensaje_raw = ""
-            for i in range(0, len(bits_lsb), 8):
-                byte = bits_lsb[i:i+8]
-                if len(byte) < 8:
-                    break
-                mensaje_raw += chr(int(''.join(byte), 2))
-                if mensaje_raw.endswith("END"):
-                    mensaje_raw = mensaje_raw[:-3]
-                    break
+            if mensaje_raw.startswith(CodificadorHuffman.MAGIC):
+                try:
+                    mensaje, tabla = self.huffman.desempaquetar_contenedor(mensaje_raw)
+                except ValueError as e:
+                    print(f"Contenedor inválido: {e}")
+                    return None, None
+                print("Mensaje Huffman recuperado correctamente (contenedor binario)")
+                print(f"Caracteres únicos en tabla: {len(tabla)}")
+                return mensaje, tabla
             
             if len(mensaje_raw) < 16:
                 print("Datos insuficientes")
@@ -274,7 +1486,7 @@ class LSBDetector:
             
             try:
                 len_tabla = int(mensaje_raw[:8])
-                tabla_json = mensaje_raw[8:8+len_tabla]
+                tabla_json = mensaje_raw[8:8+len_tabla].decode('latin-1')
                 len_msg = int(mensaje_raw[8+len_tabla:16+len_tabla])
             except (ValueError, IndexError):
                 print("Formato inválido")
@@ -287,9 +1499,7 @@ class LSBDetector:
                 return None, None
             
             inicio_datos = 16 + len_tabla
-            bits_huffman = ''.join(format(ord(c), '08b') for c in mensaje_raw[inicio_datos:])
-            bits_huffman = bits_huffman[:len_msg]
-            mensaje = self.huffman.decodificar_texto(bits_huffman, tabla)
+            mensaje = self.huffman.decodificar_bytes(mensaje_raw[inicio_datos:], len_msg, tabla)
             
             if mensaje:
                 print(f"Mensaje Huffman recuperado correctamente")
@@ -301,71 +1511,170 @@ class LSBDetector:
             traceback.print_exc()
             return None, None
 
-    def chi_square_test(self, channel_data_flat):
-        pairs_observed = []
-        pairs_expected = []
-        for i in range(0, 256, 2):
-            if i + 1 < 256:
-                even_count = np.sum(channel_data_flat == i)
-                odd_count = np.sum(channel_data_flat == i + 1)
-                pairs_observed.extend([even_count, odd_count])
-                expected = (even_count + odd_count) / 2
-                pairs_expected.extend([expected, expected])
-        pairs_observed = np.array(pairs_observed)
-        pairs_expected = np.array(pairs_expected)
+    def calcular_histograma(self, channel_flat):
+        # Una sola pasada sobre el canal; el resultado se reutiliza en chi^2, entropía y media LSB
+        return histograma_uint8(channel_flat)
+
+    def chi_square_test(self, channel_data_flat, histograma=None):
+        if histograma is None:
+            histograma = self.calcular_histograma(channel_data_flat)
+        pairs_observed = histograma[:256]
+        pairs_expected = np.repeat((histograma[0:256:2] + histograma[1:256:2]) / 2, 2)
         mask = pairs_expected > 0
         chi2 = np.sum((pairs_observed[mask] - pairs_expected[mask])**2 / pairs_expected[mask])
         df = len(pairs_observed[mask]) - 1
         p_value = 1 - stats.chi2.cdf(chi2, df) if df > 0 else 1
         return chi2, p_value, df
 
-    def lsb_analysis(self, channel_flat):
-        lsb_bits = channel_flat & 1
+    def lsb_analysis(self, channel_flat, lsb_bits=None, histograma=None):
+        if lsb_bits is None:
+            lsb_bits = channel_flat & 1
+        if histograma is not None:
+            # Con el histograma de 256 valores: unos = suma de los valores impares
+            total = histograma.sum()
+            unos = histograma[1::2].sum()
+            mean = unos / total
+            variance = mean * (1 - mean)
+            entropy = self.calculate_entropy(None, conteos=np.array([total - unos, unos]))
+        else:
+            mean = np.mean(lsb_bits)
+            variance = np.var(lsb_bits)
+            entropy = self.calculate_entropy(lsb_bits)
         lsb_stats = {
-            'mean': np.mean(lsb_bits),
-            'variance': np.var(lsb_bits),
-            'entropy': self.calculate_entropy(lsb_bits),
+            'mean': mean,
+            'variance': variance,
+            'entropy': entropy,
             'runs_test': self.runs_test(lsb_bits),
             'expected_mean': 0.5,
             'expected_variance': 0.25
         }
         return lsb_stats
 
-    def calculate_entropy(self, data):
-        unique, counts = np.unique(data, return_counts=True)
-        probabilities = counts / len(data)
+    def calculate_entropy(self, data, conteos=None):
+        if conteos is None:
+            if data.dtype.kind in 'ub':
+                conteos = np.bincount(np.asarray(data, dtype=np.intp).ravel())
+            else:
+                _, conteos = np.unique(data, return_counts=True)
+        counts = conteos[conteos > 0]
+        probabilities = counts / counts.sum()
         entropy = -np.sum(probabilities * np.log2(probabilities + 1e-10))
         return entropy
 
     def runs_test(self, binary_sequence):
-        n = len(binary_sequence)
-        if n == 0:
-            return 0, 1
-        runs = 1
-        for i in range(1, n):
-            if binary_sequence[i] != binary_sequence[i-1]:
-                runs += 1
-        ones = np.sum(binary_sequence)
-        zeros = n - ones
-        if ones == 0 or zeros == 0:
-            return runs, 1
-        expected_runs = (2 * ones * zeros) / n + 1
-        variance_runs = (2 * ones * zeros * (2 * ones * zeros - n)) / (n**2 * (n - 1))
-        if variance_runs <= 0:
-            return runs, 1
-        z_score = (runs - expected_runs) / np.sqrt(variance_runs)
-        p_value = 2 * (1 - stats.norm.cdf(abs(z_score)))
-        return z_score, p_value
+        return AcumuladorRachas().agregar(binary_sequence).resultado()
 
-    def spatial_correlation_analysis(self, channel_2d):
+    def runs_test_por_bloques(self, channel_2d, filas_por_bloque=256):
+        acumulador = AcumuladorRachas()
+        for inicio in range(0, channel_2d.shape[0], filas_por_bloque):
+            acumulador.agregar(np.bitwise_and(channel_2d[inicio:inicio + filas_por_bloque], 1))
+        return acumulador.resultado()
+
+    def spatial_correlation_analysis(self, channel_2d, filas_por_bloque=256):
+        # Pearson sobre vistas desplazadas del canal mediante sumas Σx, Σy, Σxy (sin copias)
         h, w = channel_2d.shape
-        horizontal_corr = np.corrcoef(channel_2d[:, :-1].flatten(), channel_2d[:, 1:].flatten())[0, 1] if w > 1 else 0
-        vertical_corr = np.corrcoef(channel_2d[:-1, :].flatten(), channel_2d[1:, :].flatten())[0, 1] if h > 1 else 0
+        acumulador = AcumuladorCorrelacion(direcciones=('horizontal', 'vertical'))
+        for inicio in range(0, h, filas_por_bloque):
+            acumulador.agregar(channel_2d[inicio:inicio + filas_por_bloque])
+        corr = acumulador.resultado()
+        horizontal_corr = corr['horizontal'] if w > 1 else 0
+        vertical_corr = corr['vertical'] if h > 1 else 0
         return horizontal_corr, vertical_corr
 
-    def calculate_suspicion_score(self, chi2_p_value, lsb_stats, h_corr, v_corr):
+    def correlacion_por_bloques(self, channel_2d, tam_bloque=64, filas_por_bloque=256):
+        # Correlaciones globales (incluidas las diagonales) y mapa de correlación por bloque:
+        # los bloques con correlación anormalmente baja son candidatos a contener el mensaje
+        acumulador = AcumuladorCorrelacion(tam_bloque)
+        for inicio in range(0, channel_2d.shape[0], filas_por_bloque):
+            acumulador.agregar(channel_2d[inicio:inicio + filas_por_bloque])
+        return acumulador.resultado(), acumulador.correlacion_por_bloques()
+
+    def sample_pair_analysis(self, channel_2d):
+        # Sample Pair Analysis (Dumitrescu et al.) sobre pares de píxeles vecinos horizontales y verticales.
+        # Devuelve la tasa de inserción estimada p (fracción de píxeles que llevan bits del mensaje).
+        canal = channel_2d.astype(np.int16)
+        pares = [(canal[:, :-1], canal[:, 1:]), (canal[:-1, :], canal[1:, :])]
+        P = X = Y = K = 0
+        for u, v in pares:
+            x, y, k = self._pares_spa(u, v)
+            P += u.size
+            X += np.count_nonzero(x)
+            Y += np.count_nonzero(y)
+            K += np.count_nonzero(k)
+        return float(self._tasa_spa(P, X, Y, K))
+
+    def _pares_spa(self, u, v):
+        # Máscaras de los pares (u, v) que cuentan en X, Y y K (u y v en int16)
+        v_par = (v & 1) == 0
+        x = (v_par & (u < v)) | (~v_par & (u > v))
+        y = (v_par & (u > v)) | (~v_par & (u < v))
+        return x, y, (u >> 1) == (v >> 1)
+
+    def _tasa_spa(self, P, X, Y, K):
+        # 0.5*K*p^2 + (2X - P)*p + (Y - X) = 0  ->  raíz menor (escalares o un arreglo por bloque)
+        P, X, Y, K = (np.asarray(n, dtype=np.float64) for n in (P, X, Y, K))
+        a, b, c = 0.5 * K, 2 * X - P, Y - X
+        # Con discriminante negativo (tasas altas) se toma la parte real de las raíces
+        disc = np.sqrt(np.maximum(b * b - 4 * a * c, 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            p = np.where(K > 0, (-b - disc) / (2 * a), 0.0)
+        return np.clip(p, 0.0, 1.0)
+
+    def _rs_grupos(self, grupos, mascara):
+        # Porcentaje de grupos regulares (R) y singulares (S) al aplicar el volteo F_M
+        def discriminante(g):
+            return np.abs(np.diff(g, axis=1)).sum(axis=1)
+        volteado = grupos.copy()
+        for i, m in enumerate(mascara):
+            if m == 1:
+                volteado[:, i] ^= 1
+            elif m == -1:
+                volteado[:, i] = ((volteado[:, i] + 1) ^ 1) - 1
+        f0 = discriminante(grupos)
+        f1 = discriminante(volteado)
+        n = grupos.shape[0]
+        return np.count_nonzero(f1 > f0) / n, np.count_nonzero(f1 < f0) / n
+
+    def rs_analysis(self, channel_2d, mascara=(0, 1, 1, 0)):
+        # RS steganalysis (Fridrich et al.) con grupos horizontales de len(mascara) píxeles.
+        # Devuelve la tasa de inserción estimada p.
+        k = len(mascara)
+        h, w = channel_2d.shape
+        w_util = w - w % k
+        if h == 0 or w_util == 0:
+            return 0.0
+        grupos = channel_2d[:, :w_util].astype(np.int16).reshape(-1, k)
+        mascara = np.array(mascara)
+        r_m, s_m = self._rs_grupos(grupos, mascara)
+        r_nm, s_nm = self._rs_grupos(grupos, -mascara)
+        invertidos = grupos ^ 1
+        r_m1, s_m1 = self._rs_grupos(invertidos, mascara)
+        r_nm1, s_nm1 = self._rs_grupos(invertidos, -mascara)
+        d0, d1 = r_m - s_m, r_m1 - s_m1
+        dn0, dn1 = r_nm - s_nm, r_nm1 - s_nm1
+        a = 2 * (d1 + d0)
+        b = dn0 - dn1 - d1 - 3 * d0
+        c = d0 - dn0
+        if a == 0:
+            if b == 0:
+                return 0.0
+            z = -c / b
+        else:
+            disc = max(b * b - 4 * a * c, 0)
+            raices = [(-b + np.sqrt(disc)) / (2 * a), (-b - np.sqrt(disc)) / (2 * a)]
+            z = min(raices, key=abs)
+        if z == 0.5:
+            return 1.0
+        return float(np.clip(z / (z - 0.5), 0.0, 1.0))
+
+    def calculate_suspicion_score(self, chi2_p_value, lsb_stats, h_corr, v_corr,
+                                  spa_rate=None, rs_rate=None):
 
         weights = {'chi_square': 0.4, 'mean_deviation': 0.2, 'entropy': 0.2, 'correlation': 0.2}
+        if spa_rate is not None or rs_rate is not None:
+            # Con estimadores de tasa disponibles, las heurísticas de umbral fijo pesan menos
+            weights = {'chi_square': 0.2, 'mean_deviation': 0.1, 'entropy': 0.1, 'correlation': 0.1,
+                       'spa': 0.25, 'rs': 0.25}
         score = 0
         if chi2_p_value < 0.01:
             score += weights['chi_square']
@@ -377,61 +1686,258 @@ class LSBDetector:
         avg_correlation = (abs(h_corr) + abs(v_corr)) / 2
         if avg_correlation < 0.8:
             score += weights['correlation']
+        if spa_rate is not None and spa_rate > 0.05:
+            score += weights['spa']
+        if rs_rate is not None and rs_rate > 0.05:
+            score += weights['rs']
         return min(score, 1.0)
 
-    def analizar_imagen_completo(self, image_path):
+    def analisis_por_bloques(self, channel_2d, tam_bloque=32, top_k=5, pixeles_por_banda=1 << 20):
+        """
+        Tasa de inserción SPA (sample_pair_analysis) para cada bloque tam_bloque x tam_bloque del
+        canal, más chi cuadrado, media LSB y correlación del bloque como información.
+        Devuelve (mapa de sospecha [bloques_alto, bloques_ancho], top_k regiones más sospechosas);
+        la sospecha de un bloque es su tasa SPA estimada, entre 0 y 1.
+        """
+        h, w = channel_2d.shape
+        t = tam_bloque
+        n_by, n_bx = -(-h // t), -(-w // t)
+        histogramas = np.zeros((n_by * n_bx, 256), dtype=np.int64)
+        # Conteos P, X, Y, K de SPA por bloque; cada par de vecinos cuenta en el bloque de su primer píxel
+        conteos_spa = np.zeros((4, n_by * n_bx))
+        correlacion = AcumuladorCorrelacion(t, direcciones=('horizontal', 'vertical'))
+        # Histogramas de todos los bloques con un bincount por banda: clave = bloque * 256 + valor
+        filas_banda = max(1, pixeles_por_banda // max(w, 1) // t) * t
+        id_columna = (np.arange(w) // t).astype(np.int64)
+        for inicio in range(0, h, filas_banda):
+            banda = channel_2d[inicio:inicio + filas_banda]
+            id_fila = (inicio + np.arange(banda.shape[0])) // t * n_bx
+            primero = inicio // t * n_bx
+            n_locales = id_fila[-1] + n_bx - primero
+            bloques = id_fila[:, None] + id_columna[None, :] - primero
+            conteos = np.bincount((bloques * 256 + banda).ravel(), minlength=n_locales * 256)
+            histogramas[primero:primero + n_locales] += conteos.reshape(-1, 256)
+            # La banda con la fila siguiente, para los pares verticales del borde inferior
+            extendida = channel_2d[inicio:inicio + filas_banda + 1].astype(np.int16)
+            n = banda.shape[0]
+            for u, v, ids in ((extendida[:n, :-1], extendida[:n, 1:], bloques[:, :-1]),
+                              (extendida[:-1], extendida[1:], bloques[:extendida.shape[0] - 1])):
+                ids = ids.ravel()
+                for fila, pesos in zip(conteos_spa, (None,) + self._pares_spa(u, v)):
+                    pesos = None if pesos is None else pesos.ravel()
+                    fila[primero:primero + n_locales] += np.bincount(ids, pesos, n_locales)
+            correlacion.agregar(banda)
+        
+        # Chi cuadrado por pares de valores, igual que chi_square_test pero con una fila por bloque
+        esperados = np.repeat((histogramas[:, 0::2] + histogramas[:, 1::2]) / 2, 2, axis=1)
+        mascara = esperados > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            chi2 = np.where(mascara, (histogramas - esperados) ** 2 / esperados, 0).sum(axis=1)
+        df = mascara.sum(axis=1) - 1
+        p_chi2 = np.where(df > 0, 1 - stats.chi2.cdf(chi2, np.maximum(df, 1)), 1.0)
+        
+        media = histogramas[:, 1::2].sum(axis=1) / histogramas.sum(axis=1)
+        corr = correlacion.correlacion_por_bloques().reshape(-1)
+        # En una imagen natural la entropía LSB ya es ~1 y el p-valor de chi^2 bajo o alto según la
+        # textura; la tasa SPA mide la dirección de la inserción (iguala los pares 2k, 2k+1)
+        sospecha = self._tasa_spa(*conteos_spa)
+        mapa = sospecha.reshape(n_by, n_bx)
+        
+        orden = np.argsort(-sospecha, kind='stable')[:top_k]
+        regiones = []
+        for b in orden:
+            by, bx = divmod(int(b), n_bx)
+            regiones.append({
+                'fila': by * t, 'columna': bx * t,
+                'alto': min(t, h - by * t), 'ancho': min(t, w - bx * t),
+                'sospecha': float(sospecha[b]),
+                'p_chi2': float(p_chi2[b]),
+                'media_lsb': float(media[b]),
+                'correlacion': float(corr[b]),
+            })
+        return mapa, regiones
+
+    def analizar_imagen_completo(self, image_path, forzar_extraccion=False):
         print(f"\nANÁLISIS COMPLETO DE: {os.path.basename(image_path)}")
         print("="*60)
         
-        if not self.load_image(image_path):
+        clave = None
+        if self.cache is not None:
+            try:
+                clave = self.cache.clave(image_path, 'completo')
+            except OSError as e:
+                print(f"Error cargando imagen: {e}")
+                return
+            resultado = self.cache.obtener(clave)
+            if resultado is not None:
+                print("Resultado recuperado de la caché (imagen ya analizada)")
+                for tipo in ('estandar', 'huffman'):
+                    if resultado[f'mensaje_{tipo}']:
+                        print(f"\nMENSAJE {tipo.upper()} ENCONTRADO: '{resultado[f'mensaje_{tipo}']}'")
+                self._imprimir_resultado(resultado)
+                return resultado
+        
+        try:
+            contexto = ContextoAnalisis.desde_archivo(image_path)
+        except Exception as e:
+            print(f"Error cargando imagen: {e}")
             return
+        self.image = contexto.imagen
         print(f"Imagen cargada: {self.image.shape}")
         
-        print("\n--------- EXTRACCIÓN ESTÁNDAR -----------")
-        print("\nMétodo Fuerza Bruta:")
-        mensaje_fb = self.extraer_mensaje_lsb(image_path, 'fuerza_bruta')
-        print("\nMétodo Divide y Vencerás:")
-        mensaje_dyv = self.extraer_mensaje_lsb(image_path, 'divide_y_venceras')
+        nombres = ['Rojo', 'Verde', 'Azul']
+        hallazgos = self.prefiltro_lsb(contexto.imagen)
+        print("\n--------------- PREFILTRO ----------------")
+        if hallazgos:
+            for c, formato in hallazgos:
+                print(f"Huella '{formato}' al inicio del canal {nombres[c]}")
+        else:
+            print("Sin huellas de mensaje en los primeros bytes LSB")
+        
+        channel = contexto.canal(0)
+        flat = contexto.canal_plano(0)
+        histograma = contexto.histograma(0)
+        chi2, pchi, df = self.chi_square_test(flat, histograma)
+        lsb_stats = self.lsb_analysis(flat, contexto.bits_lsb(0), histograma)
+        hc, vc = self.spatial_correlation_analysis(channel)
+        spa = self.sample_pair_analysis(channel)
+        rs = self.rs_analysis(channel)
+        suspicion = self.calculate_suspicion_score(pchi, lsb_stats, hc, vc, spa, rs)
+        mapa, regiones = self.analisis_por_bloques(channel, top_k=3)
+        
+        # Las extracciones completas solo corren si el prefiltro o la estadística lo justifican
+        mensaje_estandar = mensaje_huffman = None
+        if forzar_extraccion or hallazgos or suspicion > 0.4:
+            canal_huffman = next((c for c, f in hallazgos if f in ('huffman', 'multiplano')), 0)
+            mensaje_estandar, mensaje_huffman = self._extracciones_completas(image_path, contexto,
+                                                                             canal_huffman)
+        else:
+            print("\nExtracción completa omitida (prefiltro negativo y sospecha baja)")
         
-        mensaje_estandar = mensaje_fb or mensaje_dyv
+        if mensaje_estandar or mensaje_huffman:
+            estado = "DETECTADA"
+        elif suspicion > 0.4:
+            estado = "SOSPECHOSO"
+        else:
+            estado = "NORMAL"
+        resultado = {
+            'mensaje_estandar': mensaje_estandar,
+            'mensaje_huffman': mensaje_huffman,
+            'chi2': float(chi2), 'p_chi2': float(pchi), 'df': int(df),
+            'media_lsb': float(lsb_stats['mean']),
+            'varianza_lsb': float(lsb_stats['variance']),
+            'entropia_lsb': float(lsb_stats['entropy']),
+            'correlacion_h': float(hc), 'correlacion_v': float(vc),
+            'tasa_spa': spa, 'tasa_rs': rs,
+            'sospecha': float(suspicion),
+            'bloques_sospechosos': int(np.count_nonzero(mapa > 0.4)),
+            'bloques_total': int(mapa.size),
+            'regiones': regiones,
+            'prefiltro': [[c, f] for c, f in hallazgos],
+            'estado': estado,
+        }
+        self._imprimir_resultado(resultado)
+        if clave is not None:
+            self.cache.guardar(clave, resultado)
+        return resultado
+
+    def _extracciones_completas(self, image_path, contexto, canal_huffman=0):
+        # Con el contexto FB y DyV leerían el mismo plano LSB compartido: se extrae una sola vez
+        print("\n--------- EXTRACCIÓN ESTÁNDAR -----------")
+        mensaje_estandar = self.extraer_mensaje_lsb(image_path, contexto=contexto)
         if mensaje_estandar:
             print(f"\nMENSAJE ESTÁNDAR ENCONTRADO: '{mensaje_estandar}'")
         else:
             print("\nNo se encontró mensaje estándar")
         
         print("\n------------ EXTRACCIÓN HUFFMAN ----------")
-        print("\nMétodo Fuerza Bruta:")
-        mensaje_huff_fb, tabla_fb = self.extraer_mensaje_huffman(image_path, 'fuerza_bruta', 0)
-        print("\nMétodo Divide y Vencerás:")
-        mensaje_huff_dyv, tabla_dyv = self.extraer_mensaje_huffman(image_path, 'divide_y_venceras', 0)
-        
-        mensaje_huffman = mensaje_huff_fb or mensaje_huff_dyv
+        mensaje_huffman, _ = self.extraer_mensaje_huffman(image_path, channel=canal_huffman, contexto=contexto)
         if mensaje_huffman:
             print(f"\nMENSAJE HUFFMAN ENCONTRADO: '{mensaje_huffman}'")
         else:
             print("\nNo se encontró mensaje Huffman")
-        
+        return mensaje_estandar, mensaje_huffman
+
+    def _imprimir_resultado(self, r):
         print("\n---- ANÁLISIS ESTADÍSTICO (Canal Rojo) ----")
-        channel = self.image[:, :, 0]
-        flat = channel.flatten()
-        chi2, pchi, df = self.chi_square_test(flat)
-        lsb_stats = self.lsb_analysis(flat)
-        hc, vc = self.spatial_correlation_analysis(channel)
-        suspicion = self.calculate_suspicion_score(pchi, lsb_stats, hc, vc)
+        print(f"Chi cuadrado: {r['chi2']:.3f}, p-valor={r['p_chi2']:.5f}, df={r['df']}")
+        print(f"LSB: mean={r['media_lsb']:.3f}, var={r['varianza_lsb']:.3f}, entropía={r['entropia_lsb']:.3f}")
+        print(f"Correlación espacial: horizontal={r['correlacion_h']:.3f}, vertical={r['correlacion_v']:.3f}")
+        print(f"Tasa de inserción estimada: SPA={r['tasa_spa']:.3f}, RS={r['tasa_rs']:.3f}")
+        print(f"Puntuación de sospecha: {r['sospecha']:.2f}/1.0")
         
-        print(f"Chi cuadrado: {chi2:.3f}, p-valor={pchi:.5f}, df={df}")
-        print(f"LSB: mean={lsb_stats['mean']:.3f}, var={lsb_stats['variance']:.3f}, entropía={lsb_stats['entropy']:.3f}")
-        print(f"Correlación espacial: horizontal={hc:.3f}, vertical={vc:.3f}")
-        print(f"Puntuación de sospecha: {suspicion:.2f}/1.0")
+        print(f"\nBloques de 32x32 sospechosos (tasa SPA > 0.4): {r['bloques_sospechosos']} de {r['bloques_total']}")
+        for b in r['regiones']:
+            print(f"  fila={b['fila']}, columna={b['columna']}: tasa SPA={b['sospecha']:.2f}, "
+                  f"p-chi2={b['p_chi2']:.4f}, media LSB={b['media_lsb']:.3f}, correlación={b['correlacion']:.3f}")
         
-        if mensaje_estandar or mensaje_huffman:
+        if r['estado'] == "DETECTADA":
             print("\nEstado: ESTEGANOGRAFÍA DETECTADA")
-        elif suspicion > 0.4:
+        elif r['estado'] == "SOSPECHOSO":
             print("\nEstado: SOSPECHOSO - Posible esteganografía")
         else:
             print("\nEstado: NORMAL - No se detectó esteganografía")
 
 
+    def analizar_imagen_por_teselas(self, image_path, channel=0, filas_por_tesela=256, tam_bloque=64):
+        # Análisis estadístico para imágenes enormes: lee bandas de filas desde un memmap y
+        # acumula histograma, rachas y sumas de correlación; la memoria no depende del tamaño
+        print(f"\nANÁLISIS POR TESELAS DE: {os.path.basename(image_path)}")
+        print("="*60)
+        try:
+            imagen = abrir_imagen_mapeada(image_path)
+        except Exception as e:
+            print(f"Error abriendo imagen: {e}")
+            return None
+        h, w, _ = imagen.shape
+        print(f"Imagen mapeada: {imagen.shape} (bandas de {filas_por_tesela} filas)")
+        
+        histograma = np.zeros(256, dtype=np.int64)
+        rachas = AcumuladorRachas()
+        correlacion = AcumuladorCorrelacion(tam_bloque)
+        for inicio in range(0, h, filas_por_tesela):
+            tesela = np.ascontiguousarray(imagen[inicio:inicio + filas_por_tesela, :, channel])
+            histograma += histograma_uint8(tesela)
+            rachas.agregar(np.bitwise_and(tesela, 1))
+            correlacion.agregar(tesela)
+        
+        chi2, pchi, df = self.chi_square_test(None, histograma)
+        total = histograma.sum()
+        unos = histograma[1::2].sum()
+        media = unos / total
+        lsb_stats = {
+            'mean': media,
+            'variance': media * (1 - media),
+            'entropy': self.calculate_entropy(None, conteos=np.array([total - unos, unos])),
+            'runs_test': rachas.resultado(),
+            'expected_mean': 0.5,
+            'expected_variance': 0.25
+        }
+        corr = correlacion.resultado()
+        hc, vc = corr['horizontal'], corr['vertical']
+        mapa = correlacion.correlacion_por_bloques()
+        suspicion = self.calculate_suspicion_score(pchi, lsb_stats, hc, vc)
+        
+        print(f"Chi cuadrado: {chi2:.3f}, p-valor={pchi:.5f}, df={df}")
+        print(f"LSB: mean={lsb_stats['mean']:.3f}, var={lsb_stats['variance']:.3f}, entropía={lsb_stats['entropy']:.3f}")
+        print(f"Rachas: z={lsb_stats['runs_test'][0]:.3f}, p-valor={lsb_stats['runs_test'][1]:.5f}")
+        print(f"Correlación espacial: horizontal={hc:.3f}, vertical={vc:.3f}")
+        print(f"Correlación diagonal: {corr['diagonal']:.3f}, antidiagonal={corr['antidiagonal']:.3f}")
+        if mapa.size and not np.all(np.isnan(mapa)):
+            by, bx = np.unravel_index(np.nanargmin(mapa), mapa.shape)
+            print(f"Bloque con menor correlación: fila={by * tam_bloque}, columna={bx * tam_bloque} "
+                  f"({mapa[by, bx]:.3f})")
+        print(f"Puntuación de sospecha: {suspicion:.2f}/1.0")
+        return {
+            'chi_square': (chi2, pchi, df),
+            'lsb_stats': lsb_stats,
+            'correlation': (hc, vc),
+            'correlation_diagonal': (corr['diagonal'], corr['antidiagonal']),
+            'correlation_blocks': mapa,
+            'suspicion': suspicion,
+        }
+
+
 class EsteganografiaLSB:
     
     @staticmethod
@@ -440,21 +1946,13 @@ class EsteganografiaLSB:
             width, height = 200, 200
             imagen = np.random.randint(50, 200, (height, width, 3), dtype=np.uint8)
             
-            mensaje_con_fin = mensaje + "END"
-            mensaje_binario = ''.join(format(ord(c), '08b') for c in mensaje_con_fin)
+            mensaje_con_fin = (mensaje + "END").encode('latin-1')
             
-            if len(mensaje_binario) > width * height:
+            if len(mensaje_con_fin) * 8 > width * height:
                 print("Mensaje demasiado largo")
                 return False
             
-            bit_index = 0
-            for i in range(height):
-                for j in range(width):
-                    if bit_index < len(mensaje_binario):
-                        imagen[i, j, 0] = (imagen[i, j, 0] & 0xFE) | int(mensaje_binario[bit_index])
-                        bit_index += 1
-                    else:
-                        break
+            incrustar_bytes_lsb(imagen[:, :, 0], mensaje_con_fin)
             
             Image.fromarray(imagen).save(nombre_archivo)
             print(f"Imagen creada: {nombre_archivo}")
@@ -473,26 +1971,18 @@ class EsteganografiaLSB:
                 print("No se pudo cargar la imagen")
                 return False
             
-            imagen = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
             height, width, _ = imagen.shape
             
-            mensaje_con_fin = mensaje + "END"
-            mensaje_binario = ''.join(format(ord(c), '08b') for c in mensaje_con_fin)
+            mensaje_con_fin = (mensaje + "END").encode('latin-1')
             
-            if len(mensaje_binario) > width * height:
+            if len(mensaje_con_fin) * 8 > width * height:
                 print("Mensaje demasiado largo")
                 return False
             
-            bit_index = 0
-            for i in range(height):
-                for j in range(width):
-                    if bit_index < len(mensaje_binario):
-                        imagen[i, j, 0] = (imagen[i, j, 0] & 0xFE) | int(mensaje_binario[bit_index])
-                        bit_index += 1
-                    else:
-                        break
+            # cv2 entrega BGR: el canal rojo es el índice 2, se modifica en su lugar
+            incrustar_bytes_lsb(imagen[:, :, 2], mensaje_con_fin)
             
-            Image.fromarray(imagen).save(imagen_salida)
+            cv2.imwrite(imagen_salida, imagen)
             print(f"Mensaje oculto en: {imagen_salida}")
             return True
             
@@ -501,11 +1991,36 @@ class EsteganografiaLSB:
             return False
 
 
+def reporte_memoria(image_path, channel=0):
+    # Pico de memoria de cada etapa del análisis estadístico, para comparar implementaciones
+    detector = LSBDetector()
+    contexto, pico = medir_memoria(ContextoAnalisis.desde_archivo, image_path)
+    canal = contexto.canal(channel)
+    print(f"\nREPORTE DE MEMORIA: {os.path.basename(image_path)} {contexto.imagen.shape}")
+    print(f"Tamaño del canal: {canal.size / 2**20:.2f} MiB")
+    etapas = [
+        ("Carga de imagen", None, pico),
+        ("Histograma + Chi cuadrado", lambda: detector.chi_square_test(None, contexto.histograma(channel)), None),
+        ("Análisis LSB", lambda: detector.lsb_analysis(contexto.canal_plano(channel), contexto.bits_lsb(channel),
+                                                       contexto.histograma(channel)), None),
+        ("Correlación espacial", lambda: detector.spatial_correlation_analysis(canal), None),
+        ("Sample Pair Analysis", lambda: detector.sample_pair_analysis(canal), None),
+        ("RS", lambda: detector.rs_analysis(canal), None),
+    ]
+    picos = {}
+    for nombre, funcion, pico in etapas:
+        if funcion is not None:
+            _, pico = medir_memoria(funcion)
+        picos[nombre] = pico
+        print(f"  {nombre:<28} pico={pico / 2**20:8.2f} MiB ({pico / max(canal.size, 1):.2f} bytes/píxel)")
+    return picos
+
+
 def mostrar_menu():
     print("\n" + "="*60)
     print(" DETECTOR LSB ")
     print("="*60)
-    print("1. Analizar imagen (FB + DyV + Huffman)")
+    print("1. Analizar imagen (estándar + Huffman + estadísticas)")
     print("2. Crear imagen con mensaje estándar")
     print("3. Ocultar mensaje estándar en imagen existente")
     print("4. Ocultar mensaje con Huffman en imagen existente")
@@ -572,9 +2087,13 @@ def main():
             imagen_entrada = seleccionar_imagen()
             if imagen_entrada:
                 imagen_salida = input("Nombre del archivo de salida (default: img_huffman.png): ") or "img_huffman.png"
-                canal = input("Canal para ocultar (0=Rojo, 1=Verde, 2=Azul) [default=0]: ")
+                canal = input("Canal para ocultar (0=Rojo, 1=Verde, 2=Azul, rgb=los tres) [default=0]: ")
+                canales = [0, 1, 2] if canal.strip().lower() == 'rgb' else None
                 canal = int(canal) if canal in ['0', '1', '2'] else 0
-                detector.ocultar_mensaje_huffman(imagen_entrada, mensaje, imagen_salida, canal)
+                bits = input("Bits por canal (1-4) [default=1]: ")
+                bits = int(bits) if bits in ['1', '2', '3', '4'] else 1
+                detector.ocultar_mensaje_huffman(imagen_entrada, mensaje, imagen_salida, canal,
+                                                 canales=canales, bits_por_canal=bits)
         
         elif opcion == '5':
             print("\nGracias por usar el programa :)\n")
@@ -0,0 +1,276 @@
+import importlib.util
+import itertools
+import os
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+
+def _cargar_modulo():
+    # Por ruta y con otro nombre: "Técnica Voraz Huffman" también tiene un huffman.py
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "huffman.py")
+    spec = importlib.util.spec_from_file_location("huffman_detector_lsb", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+huffman = _cargar_modulo()
+
+TEXTOS = [
+    "a",
+    "aaaaaaaa",
+    "abracadabra",
+    "El veloz murciélago hindú comía feliz cardillo y kiwi. " * 40,
+    "日本語のテキスト、中文文本 y emojis 🎉🐍 " * 30,
+    "sustitutos sueltos \udc80\ud800 y texto normal",
+]
+
+
+def _imagen_natural(semilla, alto=256, ancho=256):
+    # Gradiente suave con textura y poco ruido, como el canal de una fotografía
+    rng = np.random.default_rng(semilla)
+    y, x = np.mgrid[0:alto, 0:ancho]
+    base = 120 + 60 * np.sin(x / 37.0 + semilla) * np.cos(y / 23.0) + 0.2 * x
+    textura = cv2.GaussianBlur(rng.normal(0, 12, (alto, ancho)), (0, 0), 3)
+    canal = np.clip(base + textura + rng.normal(0, 1.5, (alto, ancho)), 0, 255)
+    return canal.astype(np.uint8), rng
+
+
+def _incrustar(canal, rng, fila, columna, alto, ancho):
+    region = canal[fila:fila + alto, columna:columna + ancho]
+    region[...] = (region & 0xFE) | rng.integers(0, 2, region.shape, dtype=np.uint8)
+
+
+def test_bloques_region_incrustada_primero():
+    detector = huffman.LSBDetector()
+    for semilla in range(5):
+        canal, rng = _imagen_natural(semilla)
+        fila, columna = 64 * (semilla % 3), 64 * ((semilla + 1) % 4)
+        _incrustar(canal, rng, fila, columna, 64, 64)
+        _, regiones = detector.analisis_por_bloques(canal, tam_bloque=32, top_k=4)
+        # Los 4 bloques de 32x32 de la región 64x64 son los 4 más sospechosos
+        for r in regiones:
+            assert fila <= r['fila'] < fila + 64 and columna <= r['columna'] < columna + 64
+
+
+def test_bloques_franja_incrustada_primero():
+    detector = huffman.LSBDetector()
+    canal, rng = _imagen_natural(11)
+    _incrustar(canal, rng, 100, 0, 40, canal.shape[1])
+    mapa, regiones = detector.analisis_por_bloques(canal, tam_bloque=32, top_k=8)
+    assert mapa.shape == (8, 8)
+    # La franja (filas 100-139) cae en las filas de bloques 96 y 128: el resto queda detrás
+    assert all(r['fila'] in (96, 128) for r in regiones)
+
+
+def test_bloques_por_bandas_igual_que_de_una_vez():
+    detector = huffman.LSBDetector()
+    canal, rng = _imagen_natural(3, 200, 150)
+    _incrustar(canal, rng, 10, 20, 50, 60)
+    mapa, _ = detector.analisis_por_bloques(canal, tam_bloque=32)
+    mapa_bandas, _ = detector.analisis_por_bloques(canal, tam_bloque=32, pixeles_por_banda=1000)
+    assert np.allclose(mapa, mapa_bandas)
+
+
+def _bits(datos, n_bits):
+    return ''.join(format(b, '08b') for b in datos)[:n_bits]
+
+
+def _codigos_grandes(n, semilla):
+    # Muchos símbolos con frecuencias muy dispares: más de MAX_ESTADOS_AUTOMATA prefijos
+    rng = random.Random(semilla)
+    frecuencias = {chr(0x4E00 + i): rng.randint(1, 10 ** 6) for i in range(n)}
+    codificador = huffman.CodificadorHuffman()
+    return codificador.codigos_canonicos(codificador.longitudes_codigo(frecuencias, 32))
+
+
+def test_varint_ida_y_vuelta():
+    for n in [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 - 1]:
+        datos = huffman._escribir_varint(n) + b"resto"
+        assert huffman._leer_varint(datos, 0) == (n, len(datos) - 5)
+
+
+def test_varint_truncado_o_demasiado_largo():
+    with pytest.raises(IndexError):
+        huffman._leer_varint(huffman._escribir_varint(2 ** 20)[:-1], 0)
+    with pytest.raises(ValueError):
+        huffman._leer_varint(b"\x80" * 10 + b"\x01", 0)
+
+
+def test_escribir_lote_igual_que_escribir():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        longitudes = rng.integers(1, 65, rng.integers(1, 200))
+        azar = rng.integers(0, 2 ** 64, longitudes.size, dtype=np.uint64)
+        valores = [int(v) & ((1 << int(l)) - 1) for v, l in zip(azar, longitudes)]
+        previos = rng.integers(1, 65, rng.integers(0, 4))
+        uno_a_uno, lote = huffman.EscritorBits(), huffman.EscritorBits()
+        for l in previos:  # Bits pendientes en el acumulador antes del lote
+            uno_a_uno.escribir(1, int(l))
+            lote.escribir(1, int(l))
+        for v, l in zip(valores, longitudes):
+            uno_a_uno.escribir(v, int(l))
+        lote.escribir_lote(np.array(valores, dtype=np.uint64), longitudes)
+        assert lote.n_bits == uno_a_uno.n_bits
+        assert lote.cerrar() == uno_a_uno.cerrar()
+
+
+def test_lector_bits_lee_lo_escrito():
+    escritor = huffman.EscritorBits()
+    pares = [(i % (1 << (i % 17 + 1)), i % 17 + 1) for i in range(500)]
+    for v, l in pares:
+        escritor.escribir(v, l)
+    lector = huffman.LectorBits(escritor.cerrar(), escritor.n_bits)
+    assert [lector.leer(l) for _, l in pares] == [v for v, _ in pares]
+    assert lector.restantes() == 0
+    with pytest.raises(EOFError):
+        lector.leer(1)
+
+
+@pytest.mark.parametrize("texto", TEXTOS + [""])
+def test_codificar_bytes_ida_y_vuelta(texto):
+    codificador = huffman.CodificadorHuffman()
+    datos, n_bits, codigos, _ = codificador.codificar_bytes(texto)
+    assert codificador.decodificar_bytes(datos, n_bits, codigos) == texto
+    binario, codigos_texto, _ = codificador.codificar_texto(texto)
+    assert binario == _bits(datos, n_bits) and codigos_texto == codigos
+    assert codificador.decodificar_texto(binario, codigos) == texto
+
+
+@pytest.mark.parametrize("texto", TEXTOS + [""])
+def test_codificar_utf8_ida_y_vuelta(texto):
+    codificador = huffman.CodificadorHuffman()
+    datos, n_bits, longitudes, _ = codificador.codificar_utf8(texto)
+    assert codificador.decodificar_utf8(datos, n_bits, longitudes) == texto
+
+
+def test_un_solo_simbolo_usa_codigo_de_un_bit():
+    codificador = huffman.CodificadorHuffman()
+    datos, n_bits, codigos, _ = codificador.codificar_bytes("z" * 20000)
+    assert codigos == {"z": "0"} and n_bits == 20000
+    assert codificador.decodificar_bytes(datos, n_bits, codigos) == "z" * 20000
+
+
+def test_longitud_maxima_respetada():
+    # Frecuencias de Fibonacci: el Huffman óptimo da códigos de hasta n-1 bits
+    fib = [1, 1]
+    while len(fib) < 40:
+        fib.append(fib[-1] + fib[-2])
+    texto = ''.join(chr(0x41 + i) * f for i, f in enumerate(fib[:24]))
+    codificador = huffman.CodificadorHuffman()
+    codificador.LONGITUD_MAXIMA = 10
+    datos, n_bits, codigos, _ = codificador.codificar_bytes(texto)
+    assert max(len(c) for c in codigos.values()) == 10
+    assert codificador.decodificar_bytes(datos, n_bits, codigos) == texto
+
+
+def _costo_minimo(pesos, longitud_maxima):
+    # Fuerza bruta: todas las asignaciones de longitudes que cumplen Kraft
+    mejor = None
+    for longitudes in itertools.product(range(1, longitud_maxima + 1), repeat=len(pesos)):
+        if sum(1 << (longitud_maxima - l) for l in longitudes) <= 1 << longitud_maxima:
+            costo = sum(w * l for w, l in zip(pesos, longitudes))
+            mejor = costo if mejor is None else min(mejor, costo)
+    return mejor
+
+
+def test_package_merge_igual_que_fuerza_bruta():
+    rng = random.Random(5)
+    codificador = huffman.CodificadorHuffman()
+    for _ in range(60):
+        n = rng.randint(2, 6)
+        longitud_maxima = rng.randint((n - 1).bit_length(), 5)
+        pesos = sorted(rng.choice([1, 2, 3, 50, 1000]) for _ in range(n))
+        longitudes = codificador._package_merge(list(range(n)), pesos, longitud_maxima)
+        assert max(longitudes.values()) <= longitud_maxima
+        assert sum(2.0 ** -l for l in longitudes.values()) <= 1
+        assert sum(w * longitudes[k] for k, w in enumerate(pesos)) == _costo_minimo(pesos, longitud_maxima)
+    with pytest.raises(ValueError):
+        codificador._package_merge(list(range(5)), [1] * 5, 2)
+
+
+def test_estados_por_byte_igual_que_secuencial():
+    codificador = huffman.CodificadorHuffman()
+    rng = np.random.default_rng(2)
+    for texto in TEXTOS[3:5]:
+        _, _, codigos, _ = codificador.codificar_bytes(texto)
+        _, siguientes, _, _ = codificador.tabla_decodificacion(codigos)
+        for datos in (rng.integers(0, 256, 5000, dtype=np.uint8), rng.integers(0, 256, 3, dtype=np.uint8)):
+            estado, esperado = 0, []
+            for byte in datos.tolist():
+                esperado.append(estado)
+                estado = int(siguientes[estado * 256 + byte])
+            assert codificador._estados_por_byte(datos, siguientes).tolist() == esperado
+            assert codificador._estados_por_byte(datos, siguientes, max_rondas=0).tolist() == esperado
+
+
+def test_por_bits_igual_que_automata_con_bits_invalidos():
+    codificador = huffman.CodificadorHuffman()
+    rng = np.random.default_rng(3)
+    tablas = [codificador.codificar_bytes(t)[2] for t in TEXTOS[2:5]]
+    tablas.append({"a": "0", "b": "10"})  # Tabla incompleta: "11" no es ningún código
+    for codigos in tablas:
+        datos = rng.integers(0, 256, 3000, dtype=np.uint8).tobytes()
+        for n_bits in (0, 1, 13, 8 * len(datos) - 3, 8 * len(datos)):
+            esperado = codificador._decodificar(datos, n_bits, codigos)
+            assert codificador._decodificar_por_bits(datos, n_bits, codigos) == esperado
+
+
+def test_alfabeto_grande_decodifica_sin_automata(monkeypatch):
+    codificador = huffman.CodificadorHuffman()
+    codigos = _codigos_grandes(3000, 0)
+    assert not codificador._automata_acotado(codigos)
+    texto = ''.join(random.Random(1).choices(sorted(codigos), k=20000))
+    tabla = {c: (int(cod, 2), len(cod)) for c, cod in codigos.items()}
+    escritor = huffman.EscritorBits()
+    for c in texto:
+        escritor.escribir(*tabla[c])
+    monkeypatch.setattr(codificador, 'tabla_decodificacion', None)  # No debe armarse el autómata
+    assert codificador.decodificar_bytes(escritor.cerrar(), escritor.n_bits, codigos) == texto
+
+
+@pytest.mark.parametrize("utf8", [False, True])
+def test_contenedor_ida_y_vuelta(utf8):
+    codificador = huffman.CodificadorHuffman()
+    for texto in TEXTOS:
+        if utf8:
+            datos, n_bits, longitudes, _ = codificador.codificar_utf8(texto)
+            contenedor = codificador.empaquetar_contenedor_utf8(datos, n_bits, longitudes)
+        else:
+            datos, n_bits, codigos, _ = codificador.codificar_bytes(texto)
+            contenedor = codificador.empaquetar_contenedor(datos, codigos, n_bits)
+        assert codificador.desempaquetar_contenedor(contenedor)[0] == texto
+        # Con la cadena de '0'/'1' sale el mismo contenedor
+        if not utf8:
+            assert codificador.empaquetar_contenedor(_bits(datos, n_bits), codigos) == contenedor
+
+
+@pytest.mark.parametrize("utf8", [False, True])
+def test_contenedor_truncado_o_corrupto(utf8):
+    codificador = huffman.CodificadorHuffman()
+    texto = TEXTOS[4]
+    if utf8:
+        datos, n_bits, longitudes, _ = codificador.codificar_utf8(texto)
+        contenedor = codificador.empaquetar_contenedor_utf8(datos, n_bits, longitudes)
+    else:
+        datos, n_bits, codigos, _ = codificador.codificar_bytes(texto)
+        contenedor = codificador.empaquetar_contenedor(datos, codigos, n_bits)
+    for largo in range(len(contenedor)):
+        with pytest.raises(ValueError):
+            codificador.desempaquetar_contenedor(contenedor[:largo])
+    # Cualquier byte alterado lo detecta la cabecera o el CRC32
+    for i in range(len(contenedor)):
+        corrupto = bytearray(contenedor)
+        corrupto[i] ^= 0x5A
+        with pytest.raises(ValueError):
+            codificador.desempaquetar_contenedor(bytes(corrupto))
+
+
+def test_contenedor_rechaza_tabla_que_no_cumple_kraft():
+    codificador = huffman.CodificadorHuffman()
+    contenedor = codificador._empaquetar({97: 1, 98: 1, 99: 1}, b"\x55", 8, 0)
+    with pytest.raises(ValueError):
+        codificador.desempaquetar_contenedor(contenedor)
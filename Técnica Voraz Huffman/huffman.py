@@ -1,7 +1,13 @@
 # huffman_gui.py
-import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
-import heapq, json, os, math
+import heapq, json, os, math, sys, argparse, io
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, scrolledtext
+except ImportError:  # sin Tk solo queda la línea de comandos
+    tk = None
 
 # ---------------- Huffman core ----------------
 class HuffmanNode:
@@ -13,10 +19,11 @@ class HuffmanNode:
     def __lt__(self, other):
         return self.freq < other.freq
 
-def contar_frecuencias(texto):
-    freqs = {}
-    for c in texto:
-        freqs[c] = freqs.get(c, 0) + 1
+def contar_frecuencias(texto, freqs=None):
+    # freqs: conteo previo a actualizar (p.ej. al recorrer un archivo por bloques)
+    freqs = {} if freqs is None else freqs
+    for c, n in Counter(texto).items():
+        freqs[c] = freqs.get(c, 0) + n
     return freqs
 
 def construir_arbol(freqs):
@@ -38,63 +45,667 @@ def construir_arbol(freqs):
     return heapq.heappop(heap)[1]
 
 def generar_codigos(root):
+    # recorrido con pila explícita: un árbol muy desbalanceado no llega al límite de recursión
     codes = {}
-    def dfs(node, pref):
+    pila = [(root, "")]
+    while pila:
+        node, pref = pila.pop()
         if node is None:
-            return
+            continue
         if node.char is not None and node.left is None and node.right is None:
             codes[node.char] = pref or "0"
-            return
-        dfs(node.left, pref + "0")
-        dfs(node.right, pref + "1")
-    dfs(root, "")
+            continue
+        pila.append((node.right, pref + "1"))
+        pila.append((node.left, pref + "0"))
     return codes
 
+# longitud máxima de código por defecto al comprimir archivos
+LONGITUD_MAXIMA = 32
+
+def longitudes_codigo(freqs, max_len=None):
+    # longitudes de Huffman sin árbol: dos colas (hojas ordenadas por frecuencia y nodos
+    # internos, que se crean ya ordenados) y un arreglo de padres. Con max_len, si algún
+    # código queda más largo se recalculan con package-merge.
+    hojas = sorted(freqs, key=lambda ch: (freqs[ch], ch))
+    n = len(hojas)
+    if n <= 1:
+        return {ch: 1 for ch in hojas}
+    peso = [freqs[ch] for ch in hojas]
+    padre = [0] * (2 * n - 1)
+    i, j = 0, n   # frente de la cola de hojas y de la de nodos internos
+    for nuevo in range(n, 2 * n - 1):
+        suma = 0
+        for _ in range(2):
+            if i < n and (j == nuevo or peso[i] <= peso[j]):
+                k, i = i, i + 1
+            else:
+                k, j = j, j + 1
+            padre[k] = nuevo
+            suma += peso[k]
+        peso.append(suma)
+    prof = [0] * (2 * n - 1)
+    for k in range(2 * n - 3, -1, -1):
+        prof[k] = prof[padre[k]] + 1
+    if max_len is not None and max(prof[:n]) > max_len:
+        return _package_merge(hojas, peso[:n], max_len)
+    return dict(zip(hojas, prof))
+
+def _package_merge(hojas, pesos, max_len):
+    # hojas ordenadas por peso; cada nivel = hojas + paquetes (pares consecutivos) del nivel
+    # anterior. Se eligen los 2n-2 primeros del último nivel y la longitud de cada hoja es
+    # la cantidad de niveles en que queda elegida.
+    n = len(hojas)
+    if 1 << max_len < n:
+        raise ValueError(f"{n} símbolos no caben en códigos de {max_len} bits")
+    base = [(w, k) for k, w in enumerate(pesos)]
+    niveles = [base]
+    for _ in range(max_len - 1):
+        previo = niveles[-1]
+        paquetes = [(previo[a][0] + previo[a + 1][0], -1) for a in range(0, len(previo) - 1, 2)]
+        niveles.append(list(heapq.merge(base, paquetes, key=lambda x: x[0])))
+    longitudes = [0] * n
+    tomar = 2 * n - 2
+    for nivel in reversed(niveles):
+        paquetes = 0
+        for _, k in nivel[:tomar]:
+            if k < 0:
+                paquetes += 1
+            else:
+                longitudes[k] += 1
+        tomar = 2 * paquetes
+    return dict(zip(hojas, longitudes))
+
+def codigos_canonicos(codes):
+    # mismas longitudes, códigos consecutivos en orden (longitud, símbolo):
+    # basta guardar las longitudes para reconstruirlos
+    return codigos_desde_longitudes({ch: len(c) for ch, c in codes.items()})
+
+def codigos_desde_longitudes(longitudes):
+    canon = {}
+    code = 0
+    prev_len = 0
+    for ch, length in sorted(longitudes.items(), key=lambda x: (x[1], x[0])):
+        code <<= length - prev_len
+        canon[ch] = format(code, f"0{length}b")
+        code += 1
+        prev_len = length
+    return canon
+
+class EscritorBits:
+    # escribe códigos (MSB primero) en un bytearray; acumulador de < 64 bits volcado de 8 en 8 bytes
+    def __init__(self):
+        self.data = bytearray()
+        self.acc = 0
+        self.pending = 0
+    @property
+    def n_bits(self):
+        return len(self.data) * 8 + self.pending
+    def escribir(self, value, length):
+        self.acc = (self.acc << length) | value
+        self.pending += length
+        if self.pending >= 64:
+            self.pending -= 64
+            self.data += (self.acc >> self.pending).to_bytes(8, "big")
+            self.acc &= (1 << self.pending) - 1
+    def escribir_codigos(self, pares):
+        # escribir() para cada (value, length), con el acumulador en variables locales
+        data, acc, pending = self.data, self.acc, self.pending
+        for value, length in pares:
+            acc = (acc << length) | value
+            pending += length
+            if pending >= 64:
+                pending -= 64
+                data += (acc >> pending).to_bytes(8, "big")
+                acc &= (1 << pending) - 1
+        self.acc, self.pending = acc, pending
+    def cerrar(self):
+        # último byte completado con ceros
+        pad = -self.pending % 8
+        return bytes(self.data) + (self.acc << pad).to_bytes((self.pending + pad) // 8, "big")
+    def escribir_bytes(self, data, n_bits):
+        # añade los primeros n_bits de data (p.ej. un bloque ya codificado) a continuación
+        total = int.from_bytes(data, "big") >> (len(data) * 8 - n_bits)
+        total |= self.acc << n_bits
+        self.pending += n_bits
+        resto = self.pending % 8
+        self.data += (total >> resto).to_bytes(self.pending // 8, "big")
+        self.acc = total & ((1 << resto) - 1)
+        self.pending = resto
+    def vaciar(self):
+        # devuelve y descarta los bytes completos (los bits pendientes siguen en el acumulador)
+        out = bytes(self.data)
+        self.data.clear()
+        return out
+
+class LectorBits:
+    # lee de a `length` bits (MSB primero) de los primeros n_bits de data
+    def __init__(self, data, n_bits=None):
+        self.data = memoryview(data)
+        self.n_bits = len(data) * 8 if n_bits is None else min(n_bits, len(data) * 8)
+        self.pos = 0
+        self.acc = 0
+        self.available = 0
+        self.next_byte = 0
+    def restantes(self):
+        return self.n_bits - self.pos
+    def leer(self, length):
+        if length > self.restantes():
+            raise EOFError("no quedan suficientes bits")
+        while self.available < length:
+            chunk = self.data[self.next_byte:self.next_byte + 8]
+            self.acc = (self.acc << (8 * len(chunk))) | int.from_bytes(chunk, "big")
+            self.available += 8 * len(chunk)
+            self.next_byte += len(chunk)
+        self.available -= length
+        self.pos += length
+        value = self.acc >> self.available
+        self.acc &= (1 << self.available) - 1
+        return value
+
 def bits_a_bytes(bitstring):
-    b = bytearray()
-    for i in range(0, len(bitstring), 8):
-        byte = bitstring[i:i+8]
-        b.append(int(byte, 2))
-    return bytes(b)
+    # completa con ceros hasta múltiplo de 8
+    pad = -len(bitstring) % 8
+    n = len(bitstring) + pad
+    return int(bitstring + "0" * pad, 2).to_bytes(n // 8, "big") if n else b""
 
 def bytes_a_bits(b):
-    return "".join(f"{byte:08b}" for byte in b)
+    return format(int.from_bytes(b, "big"), f"0{len(b) * 8}b") if b else ""
 
 # padding: store pad length as single byte at start
-def guardar_comprimido(ruta_bin, bitstring):
-    pad_len = (8 - len(bitstring) % 8) % 8
-    bitstring_padded = bitstring + ("0" * pad_len)
-    data = bits_a_bytes(bitstring_padded)
+def guardar_comprimido(ruta_bin, data, n_bits=None):
+    # data: bytes de codificar_bytes() con su n_bits, o una cadena de '0'/'1'
+    if n_bits is None:
+        n_bits = len(data)
+        data = bits_a_bytes(data)
+    pad_len = len(data) * 8 - n_bits
     with open(ruta_bin, "wb") as f:
         f.write(bytes([pad_len]))   # 1 byte: pad length
         f.write(data)
 
-def leer_comprimido(ruta_bin):
+def leer_comprimido_bytes(ruta_bin):
+    # (data, n_bits) sin pasar por la cadena de bits
     with open(ruta_bin, "rb") as f:
         pad_len_byte = f.read(1)
         if not pad_len_byte:
-            return ""
-        pad_len = pad_len_byte[0]
+            return b"", 0
         data = f.read()
-    bitstring = bytes_a_bits(data)
-    if pad_len:
-        bitstring = bitstring[:-pad_len]
-    return bitstring
+    return data, max(len(data) * 8 - pad_len_byte[0], 0)
+
+def leer_comprimido(ruta_bin):
+    data, n_bits = leer_comprimido_bytes(ruta_bin)
+    return bytes_a_bits(data)[:n_bits]
 
 def codificar_texto(texto, codes):
     return "".join(codes[ch] for ch in texto)
 
+def codificar_bytes(texto, codes):
+    # igual que codificar_texto pero escribiendo bits empaquetados: devuelve (data, n_bits)
+    tabla = {ch: (int(c, 2), len(c)) for ch, c in codes.items()}
+    w = EscritorBits()
+    w.escribir_codigos(map(tabla.__getitem__, texto))
+    return w.cerrar(), w.n_bits
+
+# el autómata por bytes tiene 256 entradas por estado (prefijo incompleto): con alfabetos grandes
+# (p. ej. miles de caracteres CJK) o una tabla manipulada ocuparía cientos de MB. Por encima de
+# este número de estados se decodifica con TablaPrimaria, de memoria acotada.
+MAX_ESTADOS_AUTOMATA = 512
+# bits de la tabla primaria de TablaPrimaria (2^k entradas)
+BITS_TABLA_PRIMARIA = 12
+
+def automata_acotado(codes):
+    # True si el autómata tendría a lo sumo MAX_ESTADOS_AUTOMATA estados
+    prefijos = {""}
+    for c in codes.values():
+        prefijos.update(c[:i] for i in range(1, len(c)))
+        if len(prefijos) > MAX_ESTADOS_AUTOMATA:
+            return False
+    return True
+
+def construir_decodificador(codes):
+    # autómata por bytes si es pequeño; si no, tabla primaria + bit a bit
+    return construir_automata(codes) if automata_acotado(codes) else TablaPrimaria(codes)
+
+def construir_automata(codes):
+    # estados = prefijos de código incompletos (0 = raíz); el último es un sumidero
+    # para bits que no forman ningún código.
+    # tabla[estado*256 + byte] = (símbolos completados con esos 8 bits, siguiente estado*256)
+    ids = {"": 0}
+    for c in codes.values():
+        for i in range(1, len(c)):
+            ids.setdefault(c[:i], len(ids))
+    sink = len(ids)
+    hijos = [[sink, sink] for _ in range(sink + 1)]
+    simbolo = [[None, None] for _ in range(sink + 1)]
+    for pref, e in ids.items():
+        if pref:
+            hijos[ids[pref[:-1]]][int(pref[-1])] = e
+    for ch, c in codes.items():
+        if c:
+            hijos[ids[c[:-1]]][int(c[-1])] = 0
+            simbolo[ids[c[:-1]]][int(c[-1])] = ch
+    # primero de a 4 bits (16 entradas por estado) y luego cada byte = nibble alto + nibble bajo
+    nibble = []
+    for e in range(sink + 1):
+        for n4 in range(16):
+            est = e
+            partes = []
+            for i in range(3, -1, -1):
+                b = (n4 >> i) & 1
+                if simbolo[est][b] is not None:
+                    partes.append(simbolo[est][b])
+                est = hijos[est][b]
+            nibble.append(("".join(partes), est * 16))
+    tabla = []
+    for e in range(sink + 1):
+        for s1, e1 in nibble[e * 16:e * 16 + 16]:
+            for s2, e2 in nibble[e1:e1 + 16]:
+                tabla.append((s1 + s2, e2 * 16))
+    return tabla, hijos, simbolo
+
 def decodificar_bits(bitstring, codes):
-    # construir mapa inverso
-    inv = {v: k for k, v in codes.items()}
-    decoded_chars = []
-    cur = ""
-    for bit in bitstring:
-        cur += bit
-        if cur in inv:
-            decoded_chars.append(inv[cur])
-            cur = ""
-    return "".join(decoded_chars)
+    return decodificar_bytes(bits_a_bytes(bitstring), len(bitstring), codes)
+
+def decodificar_bytes(data, n_bits, codes):
+    # decodifica 8 bits por consulta con el autómata (sin concatenar bit a bit)
+    n_bits = min(n_bits, len(data) * 8)
+    if n_bits <= 0 or not codes:
+        return ""
+    return decodificar_tramo(construir_decodificador(codes), data, n_bits)[0]
+
+def decodificar_tramo(automata, data, n_bits, est=0):
+    # decodifica los primeros n_bits de data desde el estado est (en unidades de 256);
+    # devuelve (texto, estado final) para seguir con el tramo siguiente
+    if isinstance(automata, TablaPrimaria):
+        return automata.decodificar_tramo(data, n_bits, est)
+    tabla, hijos, simbolo = automata
+    n = n_bits // 8
+    decoded = []
+    for byte in data[:n]:
+        chars, est = tabla[est + byte]
+        decoded.append(chars)
+    # bits finales que no completan un byte
+    if n_bits % 8:
+        est //= 256
+        r = LectorBits(data[n:n + 1], n_bits % 8)
+        while r.restantes():
+            b = r.leer(1)
+            if simbolo[est][b] is not None:
+                decoded.append(simbolo[est][b])
+            est = hijos[est][b]
+        est *= 256
+    return "".join(decoded), est
+
+class TablaPrimaria:
+    # decodificador con memoria acotada: una consulta a la tabla de los próximos k bits resuelve
+    # los códigos de hasta k bits; los más largos siguen bit a bit con un diccionario por longitud.
+    # Da el mismo texto que el autómata, también con bits que no forman ningún código.
+    def __init__(self, codes):
+        self.por_longitud = {}
+        for ch, c in codes.items():
+            self.por_longitud.setdefault(len(c), {})[int(c, 2)] = ch
+        self.maxima = max(self.por_longitud)
+        k = min(BITS_TABLA_PRIMARIA, self.maxima)
+        cortos = sorted((l for l in self.por_longitud if l <= k), reverse=True)
+        if sum(len(self.por_longitud[l]) << (k - l) for l in cortos) > 1 << k:
+            k, cortos = 0, []  # tabla que no cumple Kraft: sin tabla primaria
+        self.k = k
+        self.primaria = [None] * (1 << k)
+        for l in cortos:  # los más cortos al final: ganan si uno es prefijo de otro
+            for valor, ch in self.por_longitud[l].items():
+                inicio = valor << (k - l)
+                self.primaria[inicio:inicio + (1 << (k - l))] = [(ch, l)] * (1 << (k - l))
+    def decodificar_tramo(self, data, n_bits, est=0):
+        # est = bits de un código empezado en el tramo anterior, con un 1 delante (0 = ninguno);
+        # -1 = sumidero, como el del autómata: tras bits que no forman ningún código no se emite más
+        if est < 0:
+            return "", est
+        primaria, k, por_longitud, maxima = self.primaria, self.k, self.por_longitud, self.maxima
+        disponibles = max(est.bit_length() - 1, 0)
+        acc = est & ((1 << disponibles) - 1)
+        restantes = disponibles + min(n_bits, len(data) * 8)
+        vista = memoryview(data)
+        siguiente = 0
+        decoded = []
+        while restantes:
+            while disponibles < maxima and siguiente < len(vista):
+                chunk = vista[siguiente:siguiente + 8]
+                acc = (acc << (8 * len(chunk))) | int.from_bytes(chunk, "big")
+                disponibles += 8 * len(chunk)
+                siguiente += len(chunk)
+            if restantes >= k:
+                entrada = primaria[(acc >> (disponibles - k)) & ((1 << k) - 1)]
+                if entrada is not None:
+                    decoded.append(entrada[0])
+                    disponibles -= entrada[1]
+                    restantes -= entrada[1]
+                    acc &= (1 << disponibles) - 1
+                    continue
+                length = k
+            else:
+                length = 0  # últimos bits del tramo: se prueban todas las longitudes
+            valor = (acc >> (disponibles - length)) & ((1 << length) - 1)
+            ch = None
+            while ch is None:
+                if length >= maxima:
+                    return "".join(decoded), -1
+                if length >= restantes:
+                    # el código sigue en el tramo siguiente
+                    return "".join(decoded), (1 << length) | valor
+                length += 1
+                valor = (valor << 1) | ((acc >> (disponibles - length)) & 1)
+                ch = por_longitud.get(length, {}).get(valor)
+            decoded.append(ch)
+            disponibles -= length
+            restantes -= length
+            acc &= (1 << disponibles) - 1
+        return "".join(decoded), 0
+
+# ---------------- Archivos por bloques ----------------
+# MAGIC | versión | varint nº símbolos | varint deltas de código Unicode | longitud de cada código
+# (1 byte) | varint total de bits | datos. Los códigos son canónicos: con las longitudes basta.
+# Desde la versión 2 sigue un índice: bits y caracteres de cada bloque (empiezan en límite de
+# símbolo), para decodificar los bloques por separado y en paralelo con la misma tabla.
+MAGIC = b"HUFV"
+VERSION = 2
+TAM_BLOQUE = 1 << 20
+
+def _abrir_texto(ruta, modo):
+    # surrogateescape: los bytes que no son UTF-8 válido también se comprimen y se recuperan
+    return open(ruta, modo, encoding="utf-8", errors="surrogateescape", newline="")
+
+def escribir_varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if not n:
+            out.append(byte)
+            return bytes(out)
+        out.append(byte | 0x80)
+
+def leer_varint(f):
+    value = shift = 0
+    while True:
+        b = f.read(1)
+        if not b:
+            raise ValueError("archivo comprimido truncado")
+        value |= (b[0] & 0x7F) << shift
+        if not b[0] & 0x80:
+            return value
+        shift += 7
+
+def tabla_a_bytes(codes):
+    # varint nº símbolos | varint deltas de código Unicode | longitud de cada código (1 byte)
+    simbolos = sorted(codes)
+    longitudes = [len(codes[ch]) for ch in simbolos]
+    if longitudes and max(longitudes) > 255:
+        raise ValueError("código Huffman demasiado largo")
+    out = bytearray(escribir_varint(len(simbolos)))
+    prev = 0
+    for ch in simbolos:
+        out += escribir_varint(ord(ch) - prev)
+        prev = ord(ch)
+    return bytes(out + bytes(longitudes))
+
+def leer_tabla(f):
+    n = leer_varint(f)
+    simbolos = []
+    prev = 0
+    for _ in range(n):
+        delta = leer_varint(f)
+        prev += delta
+        # los símbolos van en orden estricto y deben ser puntos de código válidos
+        if (simbolos and delta == 0) or prev > 0x10FFFF:
+            raise ValueError("tabla de símbolos inválida")
+        simbolos.append(chr(prev))
+    longitudes = f.read(n)
+    if len(longitudes) < n or 0 in longitudes:
+        raise ValueError("tabla de longitudes inválida")
+    # desigualdad de Kraft (en enteros, las longitudes llegan a 255): si no se cumple, los
+    # códigos canónicos no serían libres de prefijo
+    if longitudes and sum(1 << (255 - l) for l in longitudes) > 1 << 255:
+        raise ValueError("tabla de longitudes inválida")
+    return codigos_desde_longitudes(dict(zip(simbolos, longitudes)))
+
+def escribir_cabecera(f, codes, n_bits):
+    f.write(MAGIC + bytes([VERSION]) + tabla_a_bytes(codes) + escribir_varint(n_bits))
+
+def leer_cabecera(f):
+    # devuelve (codes, n_bits, versión); ValueError si no es un archivo de este formato
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("no es un archivo Huffman por bloques")
+    version = f.read(1)
+    if version not in (b"\x01", b"\x02"):
+        raise ValueError("versión de formato no soportada")
+    codes = leer_tabla(f)
+    return codes, leer_varint(f), version[0]
+
+def escribir_indice(f, entradas):
+    # varint nº bloques | dos varint por bloque | 8 bytes: posición del índice en el archivo
+    pos_indice = f.tell()
+    f.write(escribir_varint(len(entradas)))
+    for a, b in entradas:
+        f.write(escribir_varint(a) + escribir_varint(b))
+    f.write(pos_indice.to_bytes(8, "big"))
+
+def leer_entradas_indice(f, inicio):
+    # devuelve (posición del índice, [(a, b), ...]); inicio = primer byte de datos
+    f.seek(0, 2)
+    fin = f.tell()
+    if fin < inicio + 8:
+        raise ValueError("archivo comprimido truncado")
+    f.seek(fin - 8)
+    pos_indice = int.from_bytes(f.read(8), "big")
+    if not inicio <= pos_indice <= fin - 8:
+        raise ValueError("índice de bloques inválido")
+    f.seek(pos_indice)
+    return pos_indice, [(leer_varint(f), leer_varint(f)) for _ in range(leer_varint(f))]
+
+def _en_lotes(iterable, n):
+    lote = []
+    for x in iterable:
+        lote.append(x)
+        if len(lote) == n:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _crear_pool(procesos):
+    if procesos < 1:
+        raise ValueError("procesos debe ser >= 1")
+    return ProcessPoolExecutor(procesos) if procesos > 1 else None
+
+def _mapear(pool, funcion, lote):
+    return list((pool.map if pool else map)(funcion, lote))
+
+def comprimir_archivo(ruta_txt, ruta_bin, tam_bloque=TAM_BLOQUE, procesos=1):
+    # dos pasadas con memoria acotada: 1) frecuencias por bloques, 2) codificación por bloques.
+    # Cada bloque se codifica por separado con la tabla común (en paralelo si procesos > 1)
+    # y se añade al flujo de bits a continuación del anterior.
+    freqs = {}
+    with _abrir_texto(ruta_txt, "r") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), ""):
+            contar_frecuencias(bloque, freqs)
+    codes = codigos_desde_longitudes(longitudes_codigo(freqs, LONGITUD_MAXIMA))
+    n_bits = sum(freqs[ch] * len(c) for ch, c in codes.items())
+    tabla = {ch: (int(c, 2), len(c)) for ch, c in codes.items()}
+    w = EscritorBits()
+    indice = []
+    pool = _crear_pool(procesos)
+    try:
+        with _abrir_texto(ruta_txt, "r") as f, open(ruta_bin, "wb") as out:
+            escribir_cabecera(out, codes, n_bits)
+            bloques = iter(lambda: f.read(tam_bloque), "")
+            if pool is None:
+                for bloque in bloques:
+                    antes = w.n_bits
+                    w.escribir_codigos(map(tabla.__getitem__, bloque))
+                    indice.append((w.n_bits - antes, len(bloque)))
+                    out.write(w.vaciar())
+            else:
+                codificar = partial(codificar_bytes, codes=codes)
+                for lote in _en_lotes(bloques, 4 * procesos):
+                    for bloque, (data, bits) in zip(lote, pool.map(codificar, lote)):
+                        w.escribir_bytes(data, bits)
+                        indice.append((bits, len(bloque)))
+                        out.write(w.vaciar())
+            out.write(w.cerrar())
+            escribir_indice(out, indice)
+    finally:
+        if pool:
+            pool.shutdown()
+    return codes
+
+@lru_cache(maxsize=1)
+def _decodificador_de_tabla(tabla):
+    # cada proceso construye el decodificador una sola vez por archivo (todos los bloques comparten
+    # la tabla); acotado por MAX_ESTADOS_AUTOMATA, así la memoria por proceso no depende del alfabeto
+    return construir_decodificador(leer_tabla(io.BytesIO(tabla)))
+
+def _decodificar_bloque_compartido(tarea):
+    # tarea = (tabla serializada, bytes que contienen el bloque, bits a saltar al inicio, n_bits)
+    tabla, data, salto, n_bits = tarea
+    if salto:
+        total = len(data) * 8
+        data = ((int.from_bytes(data, "big") << salto) & ((1 << total) - 1)).to_bytes(len(data), "big")
+    return decodificar_tramo(_decodificador_de_tabla(tabla), data, n_bits)[0]
+
+def _descomprimir_con_indice(f, ruta_txt, codes, n_bits, procesos):
+    inicio = f.tell()
+    pos_indice, indice = leer_entradas_indice(f, inicio)
+    if sum(bits for bits, _ in indice) != n_bits or pos_indice != inicio + (n_bits + 7) // 8:
+        raise ValueError("índice de bloques inválido")
+    tabla = tabla_a_bytes(codes)
+    pool = _crear_pool(procesos)
+    try:
+        with _abrir_texto(ruta_txt, "w") as out:
+            pos = 0
+            for lote in _en_lotes(indice, 4 * procesos):
+                tareas = []
+                for bits, _ in lote:
+                    f.seek(inicio + pos // 8)
+                    data = f.read((pos % 8 + bits + 7) // 8)
+                    tareas.append((tabla, data, pos % 8, bits))
+                    pos += bits
+                for texto in _mapear(pool, _decodificar_bloque_compartido, tareas):
+                    out.write(texto)
+    finally:
+        if pool:
+            pool.shutdown()
+
+def descomprimir_archivo(ruta_bin, ruta_txt, tam_bloque=TAM_BLOQUE, procesos=1):
+    # también acepta archivos del modo adaptativo (una tabla por bloque)
+    with open(ruta_bin, "rb") as f:
+        adaptativo = f.read(len(MAGIC_ADAPTATIVO)) == MAGIC_ADAPTATIVO
+    if adaptativo:
+        return descomprimir_archivo_adaptativo(ruta_bin, ruta_txt, procesos)
+    with open(ruta_bin, "rb") as f:
+        codes, n_bits, version = leer_cabecera(f)
+        if procesos > 1 and version >= 2:
+            _descomprimir_con_indice(f, ruta_txt, codes, n_bits, procesos)
+            return codes
+        automata = construir_decodificador(codes) if codes else None
+        est = 0
+        with _abrir_texto(ruta_txt, "w") as out:
+            while n_bits > 0:
+                data = f.read(tam_bloque)
+                if not data:
+                    raise ValueError("archivo comprimido truncado")
+                bits = min(n_bits, len(data) * 8)
+                texto, est = decodificar_tramo(automata, data, bits, est)
+                out.write(texto)
+                n_bits -= bits
+    return codes
+
+# ---------------- Modo adaptativo: una tabla por bloque ----------------
+# MAGIC_ADAPTATIVO | versión | varint caracteres por bloque | bloques | índice (ver escribir_indice):
+# por bloque, bytes comprimidos y caracteres. Cada bloque = tabla propia + varint bits + datos,
+# así que se decodifica solo.
+MAGIC_ADAPTATIVO = b"HUFA"
+VERSION_ADAPTATIVO = 1
+TAM_BLOQUE_ADAPTATIVO = 1 << 16
+
+def comprimir_bloque(texto):
+    codes = codigos_desde_longitudes(longitudes_codigo(contar_frecuencias(texto), LONGITUD_MAXIMA))
+    data, n_bits = codificar_bytes(texto, codes)
+    return tabla_a_bytes(codes) + escribir_varint(n_bits) + data
+
+def descomprimir_bloque(payload):
+    f = io.BytesIO(payload)
+    codes = leer_tabla(f)
+    n_bits = leer_varint(f)
+    data = f.read()
+    if len(data) * 8 < n_bits:
+        raise ValueError("bloque truncado")
+    return decodificar_bytes(data, n_bits, codes)
+
+def _comprimir_bloque_con_largo(texto):
+    return comprimir_bloque(texto), len(texto)
+
+def comprimir_archivo_adaptativo(ruta_txt, ruta_bin, tam_bloque=TAM_BLOQUE_ADAPTATIVO, procesos=1):
+    # los bloques son independientes: con procesos > 1 se comprimen en paralelo
+    # (de a unos pocos lotes para no cargar todo el archivo en memoria)
+    indice = []
+    pool = _crear_pool(procesos)
+    try:
+        with _abrir_texto(ruta_txt, "r") as f, open(ruta_bin, "wb") as out:
+            out.write(MAGIC_ADAPTATIVO + bytes([VERSION_ADAPTATIVO]) + escribir_varint(tam_bloque))
+            bloques = iter(lambda: f.read(tam_bloque), "")
+            for lote in _en_lotes(bloques, 4 * procesos):
+                for payload, n_chars in _mapear(pool, _comprimir_bloque_con_largo, lote):
+                    out.write(payload)
+                    indice.append((len(payload), n_chars))
+            escribir_indice(out, indice)
+    finally:
+        if pool:
+            pool.shutdown()
+    return indice
+
+def leer_indice(f):
+    # devuelve (caracteres por bloque, [(posición, bytes comprimidos, caracteres), ...])
+    f.seek(0)
+    if f.read(len(MAGIC_ADAPTATIVO)) != MAGIC_ADAPTATIVO:
+        raise ValueError("no es un archivo Huffman adaptativo")
+    if f.read(1) != bytes([VERSION_ADAPTATIVO]):
+        raise ValueError("versión de formato no soportada")
+    tam_bloque = leer_varint(f)
+    pos = f.tell()
+    pos_indice, entradas = leer_entradas_indice(f, pos)
+    indice = []
+    for n_bytes, n_chars in entradas:
+        indice.append((pos, n_bytes, n_chars))
+        pos += n_bytes
+    if pos != pos_indice:
+        raise ValueError("índice de bloques inválido")
+    return tam_bloque, indice
+
+def leer_bloque(ruta_bin, k):
+    # texto del bloque k sin decodificar los anteriores
+    with open(ruta_bin, "rb") as f:
+        _, indice = leer_indice(f)
+        if not 0 <= k < len(indice):
+            raise ValueError(f"el archivo no tiene el bloque {k}")
+        pos, n_bytes, _ = indice[k]
+        f.seek(pos)
+        return descomprimir_bloque(f.read(n_bytes))
+
+def descomprimir_archivo_adaptativo(ruta_bin, ruta_txt, procesos=1):
+    pool = _crear_pool(procesos)
+    try:
+        with open(ruta_bin, "rb") as f, _abrir_texto(ruta_txt, "w") as out:
+            _, indice = leer_indice(f)
+            for lote in _en_lotes(indice, 4 * procesos):
+                payloads = []
+                for pos, n_bytes, _ in lote:
+                    f.seek(pos)
+                    payloads.append(f.read(n_bytes))
+                for texto in _mapear(pool, descomprimir_bloque, payloads):
+                    out.write(texto)
+    finally:
+        if pool:
+            pool.shutdown()
+    return indice
 
 # ---------------- GUI ----------------
 class HuffmanGUI:
@@ -144,41 +755,35 @@ class HuffmanGUI:
         if not fp:
             return
         self.filepath = fp
+        # solo una vista previa: la compresión lee el archivo por bloques
         with open(fp, "r", encoding="utf-8", errors="ignore") as f:
-            self.texto = f.read()
+            self.texto = f.read(10000)
         self.txt_area.delete(1.0, tk.END)
-        self.txt_area.insert(tk.END, self.texto[:10000])  # mostrar hasta 10k chars
+        self.txt_area.insert(tk.END, self.texto)  # mostrar hasta 10k chars
         self.lbl_stats.config(text=f"Archivo: {os.path.basename(fp)}  |  Tamaño: {os.path.getsize(fp)} bytes")
         messagebox.showinfo("Archivo cargado", "Archivo cargado correctamente. Ahora puedes comprimirlo.")
 
     def compress_file(self):
-        if not self.texto:
+        if not self.filepath:
             messagebox.showwarning("Error", "Primero abre un archivo .txt")
             return
-        freqs = contar_frecuencias(self.texto)
-        root = construir_arbol(freqs)
-        self.codes = generar_codigos(root)
-        bitstring = codificar_texto(self.texto, self.codes)
-        # elegir ruta para guardar .bin y .json
+        # elegir carpeta para guardar el .bin (la tabla de códigos va en su cabecera)
         folder = filedialog.askdirectory(title="Carpeta para guardar resultados")
         if not folder:
             return
         base = os.path.splitext(os.path.basename(self.filepath))[0]
         bin_path = os.path.join(folder, base + "_compressed.bin")
-        json_path = os.path.join(folder, base + "_codes.json")
-        guardar_comprimido(bin_path, bitstring)
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(self.codes, f, ensure_ascii=False)
+        self.codes = comprimir_archivo(self.filepath, bin_path)
         self.bin_path = bin_path
         orig_size = os.path.getsize(self.filepath)
-        comp_size = os.path.getsize(bin_path) + os.path.getsize(json_path)
+        comp_size = os.path.getsize(bin_path)
         saved = orig_size - comp_size
         pct = (1 - comp_size / orig_size) * 100 if orig_size>0 else 0
         self.lbl_stats.config(text=(
-            f"Original: {orig_size} bytes  |  Comprimido+codes: {comp_size} bytes  |  "
+            f"Original: {orig_size} bytes  |  Comprimido: {comp_size} bytes  |  "
             f"Ahorro: {saved} bytes ({pct:.2f}%)"
         ))
-        messagebox.showinfo("Comprimido", f"Guardado: {bin_path}\nCódigos: {json_path}")
+        messagebox.showinfo("Comprimido", f"Guardado: {bin_path}")
 
     def decompress_file(self):
         if not self.bin_path:
@@ -188,25 +793,38 @@ class HuffmanGUI:
             self.bin_path = bin_fp
         else:
             bin_fp = self.bin_path
-        codes_fp = filedialog.askopenfilename(title="Selecciona códigos (.json)", filetypes=[("JSON files","*.json")])
-        if not codes_fp:
-            return
-        with open(codes_fp, "r", encoding="utf-8") as f:
-            codes = json.load(f)
-        bitstring = leer_comprimido(bin_fp)
-        texto = decodificar_bits(bitstring, codes)
+        with open(bin_fp, "rb") as f:
+            formato_bloques = f.read(len(MAGIC)) in (MAGIC, MAGIC_ADAPTATIVO)
+        codes = None
+        if not formato_bloques:
+            # formato anterior: .bin con 1 byte de relleno + códigos en un .json aparte
+            codes_fp = filedialog.askopenfilename(title="Selecciona códigos (.json)", filetypes=[("JSON files","*.json")])
+            if not codes_fp:
+                return
+            with open(codes_fp, "r", encoding="utf-8") as f:
+                codes = json.load(f)
         # Guardar resultado descomprimido
         folder = filedialog.askdirectory(title="Carpeta para guardar texto descomprimido")
         if not folder:
             return
         base = os.path.splitext(os.path.basename(bin_fp))[0]
         out_path = os.path.join(folder, base + "_decompressed.txt")
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(texto)
+        if formato_bloques:
+            try:
+                descomprimir_archivo(bin_fp, out_path)
+            except ValueError as e:
+                messagebox.showerror("Error", f"No se pudo descomprimir: {e}")
+                return
+        else:
+            data, n_bits = leer_comprimido_bytes(bin_fp)
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(decodificar_bytes(data, n_bits, codes))
         messagebox.showinfo("Descomprimido", f"Descomprimido guardado en:\n{out_path}")
+        with open(out_path, "r", encoding="utf-8", errors="ignore") as f:
+            preview = f.read(10000)
         self.txt_area.delete(1.0, tk.END)
-        self.txt_area.insert(tk.END, texto[:10000])
-        self.lbl_stats.config(text=f"Descomprimido: {out_path}  |  Tamaño: {len(texto.encode('utf-8'))} bytes")
+        self.txt_area.insert(tk.END, preview)
+        self.lbl_stats.config(text=f"Descomprimido: {out_path}  |  Tamaño: {os.path.getsize(out_path)} bytes")
 
     def save_codes(self):
         if not self.codes:
@@ -234,7 +852,63 @@ class HuffmanGUI:
         st.config(state=tk.DISABLED)
 
 
+def _entero_positivo(texto):
+    n = int(texto)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"se esperaba un entero >= 1: {texto}")
+    return n
+
+def _entero_no_negativo(texto):
+    n = int(texto)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"se esperaba un entero >= 0: {texto}")
+    return n
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compresor Huffman (sin argumentos abre la interfaz gráfica)")
+    sub = parser.add_subparsers(dest="accion")
+    for accion, ayuda in (("comprimir", "texto -> .bin"), ("descomprimir", ".bin -> texto")):
+        p = sub.add_parser(accion, help=ayuda)
+        p.add_argument("entrada")
+        p.add_argument("salida")
+        p.add_argument("--bloque", type=_entero_positivo, default=None,
+                       help="caracteres (o bytes al descomprimir) leídos por bloque")
+        p.add_argument("--procesos", type=_entero_positivo, default=1,
+                       help="procesos para codificar/decodificar bloques en paralelo (default: 1)")
+        if accion == "comprimir":
+            p.add_argument("--adaptativo", action="store_true",
+                           help="una tabla Huffman por bloque, con índice para acceso aleatorio")
+    p = sub.add_parser("bloque", help="extrae un solo bloque de un .bin adaptativo")
+    p.add_argument("entrada")
+    p.add_argument("k", type=_entero_no_negativo)
+    p.add_argument("salida")
+    args = parser.parse_args(argv)
+    if args.accion is None:
+        if tk is None:
+            parser.error("tkinter no está disponible; usa 'comprimir' o 'descomprimir'")
+        root = tk.Tk()
+        HuffmanGUI(root)
+        root.mainloop()
+        return 0
+    try:
+        if args.accion == "bloque":
+            texto = leer_bloque(args.entrada, args.k)
+            with _abrir_texto(args.salida, "w") as out:
+                out.write(texto)
+        elif args.accion == "comprimir" and args.adaptativo:
+            comprimir_archivo_adaptativo(args.entrada, args.salida,
+                                         args.bloque or TAM_BLOQUE_ADAPTATIVO, args.procesos)
+        elif args.accion == "comprimir":
+            comprimir_archivo(args.entrada, args.salida, args.bloque or TAM_BLOQUE, args.procesos)
+        else:
+            descomprimir_archivo(args.entrada, args.salida, args.bloque or TAM_BLOQUE, args.procesos)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    orig, comp = os.path.getsize(args.entrada), os.path.getsize(args.salida)
+    print(f"{args.entrada} ({orig} bytes) -> {args.salida} ({comp} bytes)")
+    return 0
+
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = HuffmanGUI(root)
-    root.mainloop()
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import importlib.util
+import io
+import itertools
+import os
+import random
+import sys
+
+import pytest
+
+
+def _cargar_modulo():
+    # Por ruta y con otro nombre: el proyecto LSB también tiene un huffman.py. Se registra en
+    # sys.modules para que los procesos del pool puedan importar sus funciones.
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "huffman.py")
+    spec = importlib.util.spec_from_file_location("huffman_voraz", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+huffman = _cargar_modulo()
+
+TEXTOS = [
+    "a",
+    "aaaaaaaa",
+    "abracadabra",
+    "El veloz murciélago hindú comía feliz cardillo y kiwi. " * 40,
+    "日本語のテキスト、中文文本 y emojis 🎉🐍 " * 30,
+    "sustitutos sueltos \udc80\ud800 y texto normal",
+]
+
+
+def _codigos(texto, max_len=None):
+    return huffman.codigos_desde_longitudes(huffman.longitudes_codigo(huffman.contar_frecuencias(texto), max_len))
+
+
+def _codigos_grandes(n, semilla):
+    # Muchos símbolos con frecuencias muy dispares: más de MAX_ESTADOS_AUTOMATA prefijos
+    rng = random.Random(semilla)
+    freqs = {chr(0x4E00 + i): rng.randint(1, 10 ** 6) for i in range(n)}
+    return huffman.codigos_desde_longitudes(huffman.longitudes_codigo(freqs, huffman.LONGITUD_MAXIMA))
+
+
+def _tabla(puntos, longitudes):
+    # tabla serializada a mano, como la escribe tabla_a_bytes
+    out = bytearray(huffman.escribir_varint(len(puntos)))
+    prev = 0
+    for p in puntos:
+        out += huffman.escribir_varint(p - prev)
+        prev = p
+    return bytes(out + bytes(longitudes))
+
+
+@pytest.mark.parametrize("texto", TEXTOS + [""])
+def test_codificar_bytes_ida_y_vuelta(texto):
+    codes = _codigos(texto)
+    data, n_bits = huffman.codificar_bytes(texto, codes)
+    assert huffman.decodificar_bytes(data, n_bits, codes) == texto
+    bits = huffman.codificar_texto(texto, codes)
+    assert bits == huffman.bytes_a_bits(data)[:n_bits]
+    assert huffman.decodificar_bits(bits, codes) == texto
+
+
+def test_un_solo_simbolo():
+    codes = _codigos("z" * 1000)
+    assert codes == {"z": "0"}
+    data, n_bits = huffman.codificar_bytes("z" * 1000, codes)
+    assert n_bits == 1000 and huffman.decodificar_bytes(data, n_bits, codes) == "z" * 1000
+
+
+def test_escritor_bits():
+    pares = [(i % (1 << (i % 40 + 1)), i % 40 + 1) for i in range(300)]
+    uno_a_uno, lote, por_tramos = huffman.EscritorBits(), huffman.EscritorBits(), huffman.EscritorBits()
+    for v, l in pares:
+        uno_a_uno.escribir(v, l)
+    lote.escribir_codigos(pares)
+    for i in range(0, len(pares), 7):
+        w = huffman.EscritorBits()
+        w.escribir_codigos(pares[i:i + 7])
+        por_tramos.escribir_bytes(w.cerrar(), w.n_bits)
+    assert uno_a_uno.cerrar() == lote.cerrar() == por_tramos.cerrar()
+    lector = huffman.LectorBits(uno_a_uno.cerrar(), uno_a_uno.n_bits)
+    assert [lector.leer(l) for _, l in pares] == [v for v, _ in pares]
+    with pytest.raises(EOFError):
+        lector.leer(1)
+
+
+def _costo_minimo(pesos, max_len):
+    # fuerza bruta: todas las asignaciones de longitudes que cumplen Kraft
+    mejor = None
+    for longs in itertools.product(range(1, max_len + 1), repeat=len(pesos)):
+        if sum(1 << (max_len - l) for l in longs) <= 1 << max_len:
+            costo = sum(w * l for w, l in zip(pesos, longs))
+            mejor = costo if mejor is None else min(mejor, costo)
+    return mejor
+
+
+def test_package_merge_igual_que_fuerza_bruta():
+    rng = random.Random(5)
+    for _ in range(60):
+        n = rng.randint(2, 6)
+        max_len = rng.randint((n - 1).bit_length(), 5)
+        pesos = sorted(rng.choice([1, 2, 3, 50, 1000]) for _ in range(n))
+        longs = huffman._package_merge(list(range(n)), pesos, max_len)
+        assert max(longs.values()) <= max_len
+        assert sum(w * longs[k] for k, w in enumerate(pesos)) == _costo_minimo(pesos, max_len)
+    with pytest.raises(ValueError):
+        huffman._package_merge(list(range(5)), [1] * 5, 2)
+
+
+def test_longitud_maxima_respetada():
+    # frecuencias de Fibonacci: el Huffman óptimo da códigos de hasta n-1 bits
+    fib = [1, 1]
+    while len(fib) < 24:
+        fib.append(fib[-1] + fib[-2])
+    texto = "".join(chr(0x41 + i) * f for i, f in enumerate(fib))
+    assert max(len(c) for c in _codigos(texto).values()) == 23
+    codes = _codigos(texto, 10)
+    assert max(len(c) for c in codes.values()) == 10
+    data, n_bits = huffman.codificar_bytes(texto, codes)
+    assert huffman.decodificar_bytes(data, n_bits, codes) == texto
+
+
+def test_tabla_primaria_igual_que_automata():
+    rng = random.Random(7)
+    tablas = [_codigos(t) for t in TEXTOS[2:5]] + [{"a": "0", "b": "10"}]  # "11": ningún código
+    for codes in tablas:
+        automata, tabla = huffman.construir_automata(codes), huffman.TablaPrimaria(codes)
+        data = bytes(rng.randrange(256) for _ in range(500))
+        for n_bits in (0, 1, 13, 8 * len(data) - 3, 8 * len(data)):
+            assert tabla.decodificar_tramo(data, n_bits)[0] == huffman.decodificar_tramo(automata, data, n_bits)[0]
+        # por tramos, con un código partido entre dos tramos
+        est_a = est_t = 0
+        texto_a = texto_t = ""
+        for i in range(0, len(data), 37):
+            a, est_a = huffman.decodificar_tramo(automata, data[i:i + 37], 8 * 37, est_a)
+            t, est_t = huffman.decodificar_tramo(tabla, data[i:i + 37], 8 * 37, est_t)
+            texto_a += a
+            texto_t += t
+        assert texto_a == texto_t
+
+
+def test_alfabeto_grande_no_arma_automata():
+    codes = _codigos_grandes(3000, 0)
+    assert not huffman.automata_acotado(codes)
+    assert isinstance(huffman.construir_decodificador(codes), huffman.TablaPrimaria)
+    texto = "".join(random.Random(1).choices(sorted(codes), k=20000))
+    data, n_bits = huffman.codificar_bytes(texto, codes)
+    assert huffman.decodificar_bytes(data, n_bits, codes) == texto
+
+
+def test_leer_tabla_ida_y_vuelta():
+    for codes in (_codigos(TEXTOS[4]), _codigos_grandes(500, 2), {}):
+        assert huffman.leer_tabla(io.BytesIO(huffman.tabla_a_bytes(codes))) == codes
+
+
+@pytest.mark.parametrize("puntos, longitudes", [
+    ([97, 98, 99], [1, 1, 1]),    # no cumple Kraft
+    ([97, 98, 99], [1, 2, 1]),
+    ([97, 98], [0, 1]),           # longitud cero
+    ([97, 97], [1, 1]),           # símbolo repetido
+    ([97, 0x110000], [1, 1]),     # fuera de Unicode
+])
+def test_leer_tabla_rechaza_tablas_invalidas(puntos, longitudes):
+    with pytest.raises(ValueError):
+        huffman.leer_tabla(io.BytesIO(_tabla(puntos, longitudes)))
+
+
+def test_leer_tabla_truncada():
+    tabla = huffman.tabla_a_bytes(_codigos(TEXTOS[3]))
+    for largo in range(len(tabla)):
+        with pytest.raises(ValueError):
+            huffman.leer_tabla(io.BytesIO(tabla[:largo]))
+
+
+def _escribir(ruta, texto):
+    with huffman._abrir_texto(ruta, "w") as f:
+        f.write(texto)
+
+
+def _leer(ruta):
+    with huffman._abrir_texto(ruta, "r") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("adaptativo", [False, True])
+@pytest.mark.parametrize("procesos", [1, 2])
+def test_archivo_ida_y_vuelta(tmp_path, adaptativo, procesos):
+    texto = "".join(TEXTOS[:-1]) * 20  # los sustitutos en archivo: test_archivo_con_bytes_no_utf8
+    txt, binario, salida = tmp_path / "a.txt", tmp_path / "a.bin", tmp_path / "b.txt"
+    _escribir(txt, texto)
+    if adaptativo:
+        huffman.comprimir_archivo_adaptativo(txt, binario, tam_bloque=3000, procesos=procesos)
+        assert huffman.leer_bloque(binario, 2) == texto[6000:9000]
+    else:
+        huffman.comprimir_archivo(txt, binario, tam_bloque=3000, procesos=procesos)
+    huffman.descomprimir_archivo(binario, salida, tam_bloque=500, procesos=procesos)
+    assert _leer(salida) == texto
+
+
+def test_archivo_con_bytes_no_utf8(tmp_path):
+    txt, binario, salida = tmp_path / "a.txt", tmp_path / "a.bin", tmp_path / "b.txt"
+    crudo = "año".encode("utf-8") + b"\xff\xfe latin-1: \xe9" * 50
+    txt.write_bytes(crudo)
+    huffman.comprimir_archivo(txt, binario)
+    huffman.descomprimir_archivo(binario, salida)
+    assert salida.read_bytes() == crudo
+
+
+def test_archivo_vacio(tmp_path):
+    txt, binario, salida = tmp_path / "a.txt", tmp_path / "a.bin", tmp_path / "b.txt"
+    txt.write_bytes(b"")
+    huffman.comprimir_archivo(txt, binario)
+    huffman.descomprimir_archivo(binario, salida, procesos=2)
+    assert salida.read_bytes() == b""
+
+
+@pytest.mark.parametrize("adaptativo", [False, True])
+def test_archivo_truncado(tmp_path, adaptativo):
+    txt, binario, salida = tmp_path / "a.txt", tmp_path / "a.bin", tmp_path / "b.txt"
+    _escribir(txt, TEXTOS[3] * 10)
+    if adaptativo:
+        huffman.comprimir_archivo_adaptativo(txt, binario, tam_bloque=1000)
+    else:
+        huffman.comprimir_archivo(txt, binario, tam_bloque=1000)
+    completo = binario.read_bytes()
+    for largo in range(0, len(completo), 7):
+        binario.write_bytes(completo[:largo])
+        with pytest.raises(ValueError):
+            huffman.descomprimir_archivo(binario, salida, procesos=1 if adaptativo else 2)